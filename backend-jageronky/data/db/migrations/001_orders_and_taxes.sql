@@ -0,0 +1,130 @@
+-- brings a database created from the original schema up to date for orders, imports and taxes:
+-- import checkpoints and errors, stored order points, the change feed, and money as integer
+-- cents / rates as integer micro-units. Every step checks the current state, so it is safe to run
+-- on a database that already has some of these changes.
+
+create extension if not exists pg_prewarm;
+
+do $$
+begin
+    create type import_status as enum ('in_progress', 'completed');
+exception when duplicate_object then
+    null;
+end;
+$$;
+
+-- imports that existed before checkpoints were all-or-nothing, so they are complete
+alter table imports add column if not exists status import_status not null default 'completed';
+alter table imports alter column status set default 'in_progress';
+alter table imports add column if not exists checkpoint_row bigint not null default 0 check (checkpoint_row >= 0);
+
+create table if not exists import_errors(
+    id bigserial primary key,
+
+    import_id bigint not null references imports(id) on delete cascade,
+    line_number bigint not null check (line_number > 0),
+    reason text not null,
+
+    unique (import_id, line_number)
+);
+
+alter table orders add column if not exists geom geometry(Point, 4326)
+    generated always as (st_setsrid(st_makepoint(longitude, latitude), 4326)) stored;
+create index if not exists idx_orders_geom on orders using gist (geom);
+
+
+-- numeric dollars / rates -> integer cents / micro-units, rounded half away from zero
+do $$
+declare
+    col record;
+begin
+    if exists (
+        select 1
+        from information_schema.columns
+        where table_schema = 'public' and table_name = 'order_taxes' and column_name = 'composite_tax_rate'
+    ) then
+        update order_taxes
+        set special_rates = (
+            select coalesce(jsonb_agg(round(rate::numeric * 1000000)::integer), '[]'::jsonb)
+            from jsonb_array_elements_text(special_rates) rate
+        )
+        where special_rates <> '[]'::jsonb;
+    end if;
+
+    for col in
+        select *
+        from (values
+            ('orders', 'subtotal', 'subtotal_cents', 'bigint', 100),
+            ('order_taxes', 'composite_tax_rate', 'composite_rate_micros', 'integer', 1000000),
+            ('order_taxes', 'tax_amount', 'tax_amount_cents', 'bigint', 100),
+            ('order_taxes', 'total_amount', 'total_amount_cents', 'bigint', 100),
+            ('order_taxes', 'state_rate', 'state_rate_micros', 'integer', 1000000),
+            ('order_taxes', 'county_rate', 'county_rate_micros', 'integer', 1000000),
+            ('order_taxes', 'city_rate', 'city_rate_micros', 'integer', 1000000)
+        ) v(table_name, old_name, new_name, new_type, scale)
+    loop
+        continue when not exists (
+            select 1
+            from information_schema.columns c
+            where c.table_schema = 'public' and c.table_name = col.table_name and c.column_name = col.old_name
+        );
+
+        execute format('alter table %I rename column %I to %I', col.table_name, col.old_name, col.new_name);
+        execute format(
+            'alter table %I alter column %I type %s using round(%I * %s)',
+            col.table_name, col.new_name, col.new_type, col.new_name, col.scale
+        );
+
+        if exists (select 1 from pg_constraint where conname = col.table_name || '_' || col.old_name || '_check') then
+            execute format(
+                'alter table %I rename constraint %I to %I',
+                col.table_name, col.table_name || '_' || col.old_name || '_check', col.table_name || '_' || col.new_name || '_check'
+            );
+        end if;
+    end loop;
+end;
+$$;
+
+
+-- rows written before the change feed existed get the migrating transaction's id
+alter table order_taxes add column if not exists change_xid xid8 not null default pg_current_xact_id();
+create index if not exists idx_order_taxes_change on order_taxes(change_xid, order_id);
+
+create or replace function order_taxes_touch() returns trigger language plpgsql as $$
+begin
+    -- a recalculation is a new change: it moves both the change cursor and the ETag version
+    new.change_xid := pg_current_xact_id();
+    new.calculated_dt := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists trg_order_taxes_touch on order_taxes;
+create trigger trg_order_taxes_touch
+    before update on order_taxes
+    for each row execute function order_taxes_touch();
+
+create or replace function order_taxes_notify() returns trigger language plpgsql as $$
+begin
+    perform pg_notify('order_changes', (
+        select json_build_object(
+            'max_order_id', max(order_id),
+            'max_calculated_us', (extract(epoch from max(calculated_dt)) * 1000000)::bigint
+        )::text
+        from new_rows
+    ));
+    return null;
+end;
+$$;
+
+drop trigger if exists trg_order_taxes_notify_insert on order_taxes;
+create trigger trg_order_taxes_notify_insert
+    after insert on order_taxes
+    referencing new table as new_rows
+    for each statement execute function order_taxes_notify();
+
+drop trigger if exists trg_order_taxes_notify_update on order_taxes;
+create trigger trg_order_taxes_notify_update
+    after update on order_taxes
+    referencing new table as new_rows
+    for each statement execute function order_taxes_notify();
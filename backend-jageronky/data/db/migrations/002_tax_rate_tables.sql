@@ -0,0 +1,24 @@
+-- rate tables for the set-based import tax engine (IMPORT_TAX_ENGINE=sql); filled by the backend at startup
+
+create table if not exists tax_state_rates(
+    state char(2) primary key,
+    state_rate_micros integer not null check (state_rate_micros >= 0),
+    mctd_rate_micros integer not null check (mctd_rate_micros >= 0)
+);
+
+create table if not exists tax_county_rates(
+    state char(2) not null references tax_state_rates(state) on delete cascade,
+    name text not null,
+    county_rate_micros integer not null check (county_rate_micros >= 0),
+    mctd boolean not null,
+
+    primary key (state, name)
+);
+
+create table if not exists tax_city_rates(
+    state char(2) not null references tax_state_rates(state) on delete cascade,
+    name text not null,
+    city_rate_micros integer not null check (city_rate_micros >= 0),
+
+    primary key (state, name)
+);
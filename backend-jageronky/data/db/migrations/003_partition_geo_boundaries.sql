@@ -0,0 +1,32 @@
+-- geo_boundaries is list-partitioned by state. A plain table cannot be converted in place, and its rows
+-- have no state, so it is dropped and recreated empty; db-seed then reloads every state's boundaries
+-- (from a snapshot when one matches) in the same run.
+
+do $$
+begin
+    if exists (select 1 from pg_class where oid = to_regclass('public.geo_boundaries') and relkind = 'r') then
+        drop table geo_boundaries;
+        delete from seed_meta where key = 'boundary_checksum';
+    end if;
+end;
+$$;
+
+create table if not exists geo_boundaries(
+    id bigserial,
+    state char(2) not null,
+    name text not null,
+    type jurisdiction_type not null,
+    geom geometry(MultiPolygon, 4326) not null,
+
+    primary key (state, id),
+    unique (state, name, type)
+) partition by list (state);
+
+create index if not exists idx_geo_boundaries_geom on geo_boundaries using gist (geom);
+
+create table if not exists state_extents(
+    state char(2) primary key,
+    extent geometry(Polygon, 4326) not null
+);
+
+create index if not exists idx_state_extents_extent on state_extents using gist (extent);
@@ -1,9 +1,11 @@
 create extension if not exists postgis;
+create extension if not exists pg_prewarm;
 
 
 create type order_source as enum ('manual', 'import');
 create type tax_calc_status as enum ('calculated', 'failed');
 create type jurisdiction_type as enum ('county', 'city');
+create type import_status as enum ('in_progress', 'completed');
 
 
 create table imports(
@@ -12,12 +14,24 @@ create table imports(
     file_name text not null,
     file_sha256 text not null unique,
     imported_dt timestamptz not null default now(),
+    status import_status not null default 'in_progress',
+    checkpoint_row bigint not null default 0 check (checkpoint_row >= 0),
 
     total_rows bigint not null default 0 check (total_rows >= 0),
     inserted_rows bigint not null default 0 check (inserted_rows >= 0),
     failed_rows bigint not null default 0 check (failed_rows >= 0)
 );
 
+create table import_errors(
+    id bigserial primary key,
+
+    import_id bigint not null references imports(id) on delete cascade,
+    line_number bigint not null check (line_number > 0),
+    reason text not null,
+
+    unique (import_id, line_number)
+);
+
 create table orders(
     id bigserial primary key,
 
@@ -27,8 +41,10 @@ create table orders(
 
     latitude double precision not null check (-90 <= latitude and latitude <= 90),
     longitude double precision not null check (-180 <= longitude and longitude <= 180),
+    geom geometry(Point, 4326) generated always as (st_setsrid(st_makepoint(longitude, latitude), 4326)) stored,
 
-    subtotal numeric(12,2) not null check (subtotal >= 0),
+    -- money is stored as integer cents, rates as integer micro-units (0.04 -> 40000)
+    subtotal_cents bigint not null check (subtotal_cents >= 0),
     ordered_dt timestamptz not null,
     created_dt timestamptz not null default now(),
 
@@ -42,23 +58,61 @@ create table orders(
 );
 
 create index idx_orders_ordered_dt on orders(ordered_dt);
-create index idx_orders_subtotal on orders(subtotal);
+create index idx_orders_subtotal on orders(subtotal_cents);
 create index idx_orders_source on orders(source);
 create index idx_orders_import_id on orders(import_id);
 create index idx_orders_ordered_dt_id on orders(ordered_dt desc, id desc);
+create index idx_orders_geom on orders using gist (geom);
 
 
+-- one partition per state (geo_boundaries_ny, ...), created by the seeder; each has its own GiST index
 create table geo_boundaries(
-    id bigserial primary key,
+    id bigserial,
+    state char(2) not null,
     name text not null,
     type jurisdiction_type not null,
     geom geometry(MultiPolygon, 4326) not null,
 
-    unique (name, type)
-);
+    primary key (state, id),
+    unique (state, name, type)
+) partition by list (state);
 
 create index idx_geo_boundaries_geom on geo_boundaries using gist (geom);
 
+-- bounding box of every loaded state; lookups match a point against these first,
+-- so only the partitions of the states whose box contains it are probed
+create table state_extents(
+    state char(2) primary key,
+    extent geometry(Polygon, 4326) not null
+);
+
+create index idx_state_extents_extent on state_extents using gist (extent);
+
+
+-- copies of data/tax_rates/*.json, synced at startup, for computing import taxes in a single statement
+create table tax_state_rates(
+    state char(2) primary key,
+    state_rate_micros integer not null check (state_rate_micros >= 0),
+    mctd_rate_micros integer not null check (mctd_rate_micros >= 0)
+);
+
+create table tax_county_rates(
+    state char(2) not null references tax_state_rates(state) on delete cascade,
+    name text not null,
+    county_rate_micros integer not null check (county_rate_micros >= 0),
+    mctd boolean not null,
+
+    primary key (state, name)
+);
+
+create table tax_city_rates(
+    state char(2) not null references tax_state_rates(state) on delete cascade,
+    name text not null,
+    city_rate_micros integer not null check (city_rate_micros >= 0),
+
+    primary key (state, name)
+);
+
 
 create table order_taxes(
     id bigserial primary key,
@@ -66,30 +120,31 @@ create table order_taxes(
     order_id bigint not null unique references orders(id) on delete cascade,
     status tax_calc_status not null default 'failed',
 
-    composite_tax_rate numeric(9,6) null check (composite_tax_rate >= 0),
+    composite_rate_micros integer null check (composite_rate_micros >= 0),
 
-    tax_amount numeric(12,2) null check (tax_amount >= 0),
-    total_amount numeric(12,2) null check (total_amount >= 0),
+    tax_amount_cents bigint null check (tax_amount_cents >= 0),
+    total_amount_cents bigint null check (total_amount_cents >= 0),
 
-    state_rate numeric(9,6) null check (state_rate >= 0),
-    county_rate numeric(9,6) null check (county_rate >= 0),
-    city_rate numeric(9,6) null check (city_rate >= 0),
+    state_rate_micros integer null check (state_rate_micros >= 0),
+    county_rate_micros integer null check (county_rate_micros >= 0),
+    city_rate_micros integer null check (city_rate_micros >= 0),
 
     special_rates jsonb not null default '[]'::jsonb,
     jurisdictions jsonb not null,
 
     calculated_dt timestamptz not null default now(),
+    change_xid xid8 not null default pg_current_xact_id(),
     error_text text null,
 
     check (
         status != 'calculated'
         or (
-            composite_tax_rate is not null
-            and state_rate is not null
-            and county_rate is not null
-            and city_rate is not null
-            and tax_amount is not null
-            and total_amount is not null
+            composite_rate_micros is not null
+            and state_rate_micros is not null
+            and county_rate_micros is not null
+            and city_rate_micros is not null
+            and tax_amount_cents is not null
+            and total_amount_cents is not null
             and error_text is null
         )
     ),
@@ -99,3 +154,40 @@ create table order_taxes(
 create index idx_order_taxes_status on order_taxes(status);
 create index idx_order_taxes_calculated_dt on order_taxes(calculated_dt);
 create index idx_order_taxes_jurisdictions_gin on order_taxes using gin (jurisdictions);
+create index idx_order_taxes_change on order_taxes(change_xid, order_id);
+
+
+-- change feed: every insert/recalculation gets the writing transaction id, and
+-- listeners on 'order_changes' are notified once per statement at commit
+create function order_taxes_touch() returns trigger language plpgsql as $$
+begin
+    -- a recalculation is a new change: it moves both the change cursor and the ETag version
+    new.change_xid := pg_current_xact_id();
+    new.calculated_dt := now();
+    return new;
+end;
+$$;
+
+create trigger trg_order_taxes_touch
+    before update on order_taxes
+    for each row execute function order_taxes_touch();
+
+create function order_taxes_notify() returns trigger language plpgsql as $$
+begin
+    -- listeners only need to know that something committed; statements that wrote no rows stay silent
+    if exists (select 1 from new_rows) then
+        perform pg_notify('order_changes', '');
+    end if;
+    return null;
+end;
+$$;
+
+create trigger trg_order_taxes_notify_insert
+    after insert on order_taxes
+    referencing new table as new_rows
+    for each statement execute function order_taxes_notify();
+
+create trigger trg_order_taxes_notify_update
+    after update on order_taxes
+    referencing new table as new_rows
+    for each statement execute function order_taxes_notify();
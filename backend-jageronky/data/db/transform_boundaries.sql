@@ -1,5 +1,6 @@
-insert into geo_boundaries(name, type, geom)
+insert into geo_boundaries(state, name, type, geom)
 select
+    :'state' as state,
     trim("NAME") as name,
     'county' as type,
     st_multi(st_makevalid(geom)) as geom
@@ -7,11 +8,18 @@ from geo_counties_raw;
 
 drop table geo_counties_raw;
 
-insert into geo_boundaries(name, type, geom)
+insert into geo_boundaries(state, name, type, geom)
 select
+    :'state' as state,
     trim("NAME") as name,
     'city' as type,
     st_multi(st_makevalid(geom)) as geom
 from geo_cities_raw;
 
 drop table geo_cities_raw;
+
+insert into state_extents(state, extent)
+select :'state', st_envelope(st_extent(geom)::geometry)
+from geo_boundaries
+where state = :'state'
+on conflict (state) do update set extent = excluded.extent;
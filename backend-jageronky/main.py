@@ -1,20 +1,88 @@
+import asyncio
+import os
+import signal
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 from src.routers.orders import router as orders_router
-from src.core.tax_config import TaxConfig
+from src.routers.health import router as health_router
+from src.core.admission import AdmissionController, AdmissionMiddleware
+from src.core.config import Config
+from src.core.tax_config import load_tax_config
+from src.db.session import AsyncSessionLocal, engine, bulk_engine, probe_engine, check_db
+from src.services.order_batcher import OrderWriteBatcher
+from src.services.change_feed import ChangeFeed
+from src.services.tax_rate_tables import TaxRateTablesService
+
+# module level so that `gunicorn --preload` loads it once in the master process
+tax_config = load_tax_config(Config.TAX_RATES_PATH)
+admission = AdmissionController()
+
+
+def install_drain_handler(app: FastAPI) -> None:
+    # the server stops accepting as soon as it handles SIGTERM, before lifespan shutdown runs, so readiness
+    # is failed here first and the signal is passed on only after the balancer had time to notice
+    loop = asyncio.get_running_loop()
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def forward() -> None:
+        loop.remove_signal_handler(signal.SIGTERM)
+        signal.signal(signal.SIGTERM, previous)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    def on_sigterm() -> None:
+        if app.state.draining:
+            return
+        app.state.draining = True
+        loop.call_later(Config.PRE_STOP_DELAY_S, forward)
+
+    try:
+        loop.add_signal_handler(signal.SIGTERM, on_sigterm)
+    except (NotImplementedError, RuntimeError, ValueError):
+        # no loop signal handlers (Windows, or the loop is not in the main thread): readiness then fails
+        # when lifespan shutdown sets the draining flag
+        pass
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("startup logic here")
-    app.state.tax_config = TaxConfig("data/tax_rates.json")
+    app.state.tax_config = tax_config
+    app.state.admission = admission
+    app.state.draining = False
+    app.state.warm = await check_db(warm_up=True)
+
+    if Config.IMPORT_TAX_ENGINE == 'sql':
+        async with AsyncSessionLocal() as db:
+            await TaxRateTablesService(db).sync(tax_config)
+
+    app.state.order_batcher = None
+    if Config.ORDER_BATCH_WINDOW_MS > 0:
+        app.state.order_batcher = OrderWriteBatcher(
+            tax_config=tax_config,
+            window_ms=Config.ORDER_BATCH_WINDOW_MS,
+            max_size=Config.ORDER_BATCH_MAX_SIZE,
+            queue_timeout_s=Config.ORDER_BATCH_QUEUE_TIMEOUT_S,
+        )
+        app.state.order_batcher.start()
+
+    app.state.change_feed = ChangeFeed()
+    await app.state.change_feed.start()
+
+    install_drain_handler(app)
 
     yield
 
-    print("shutdown logic here")
+    app.state.draining = True
+    if app.state.order_batcher is not None:
+        await app.state.order_batcher.stop()
+    await app.state.change_feed.stop()
+    await engine.dispose()
+    await bulk_engine.dispose()
+    await probe_engine.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -27,6 +95,15 @@ CORS_HEADERS = {
 }
 
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request, exc: PoolTimeoutError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "No database connection available, retry later."},
+        headers={**CORS_HEADERS, "Retry-After": "1"},
+    )
+
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request, exc: Exception):
     return JSONResponse(
@@ -36,15 +113,20 @@ async def unhandled_exception_handler(request, exc: Exception):
     )
 
 
+# added before CORS so that CORS wraps it and 429 responses carry the CORS headers
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # for local development; on production specify specific domains
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After"],
 )
 
 app.include_router(orders_router, prefix="/orders")
+app.include_router(health_router)
 
 
 @app.get("/")
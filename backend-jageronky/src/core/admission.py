@@ -0,0 +1,160 @@
+import asyncio
+import math
+import time
+
+from fastapi.responses import JSONResponse
+
+from src.core.config import Config
+
+# long-lived or operational endpoints that must never queue behind user traffic
+EXEMPT_PATHS = {'/healthz', '/readyz', '/admission', '/orders/stream'}
+BULK_PATHS = {'/orders/import'}
+
+# smoothing factor for the per-lane service time used to estimate Retry-After
+SERVICE_TIME_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f'{lane} lane is overloaded')
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class AdmissionLane:
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout_s: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self._queue_timeout = queue_timeout_s
+        self._semaphore = asyncio.Semaphore(limit)
+        self._no_waiters = asyncio.Event()
+        self._no_waiters.set()
+        self._service_time = 0.1
+
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    async def acquire(self) -> float:
+        if not self._semaphore.locked():
+            # a free slot and nobody queued: does not block
+            await self._semaphore.acquire()
+            self.active += 1
+            return time.monotonic()
+
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(self.name, self.retry_after())
+
+        self.waiting += 1
+        self._no_waiters.clear()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self._queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded(self.name, self.retry_after()) from None
+        finally:
+            self.waiting -= 1
+            if self.waiting == 0:
+                self._no_waiters.set()
+
+        self.active += 1
+        return time.monotonic()
+
+    def release(self, started: float) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+        elapsed = time.monotonic() - started
+        self._service_time += (elapsed - self._service_time) * SERVICE_TIME_ALPHA
+
+    def retry_after(self) -> int:
+        # time for the current queue to drain at the observed service rate
+        return max(1, math.ceil(self._service_time * (self.waiting + 1) / self.limit))
+
+    async def wait_for_no_waiters(self, timeout_s: float) -> None:
+        try:
+            await asyncio.wait_for(self._no_waiters.wait(), timeout_s)
+        except asyncio.TimeoutError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            'active': self.active,
+            'waiting': self.waiting,
+            'limit': self.limit,
+            'max_queue': self.max_queue,
+            'rejected': self.rejected,
+            'service_time_ms': round(self._service_time * 1000, 1),
+        }
+
+
+# per worker process: imports and interactive requests get separate concurrency limits
+# (and separate connection pools, see db/session.py), and interactive requests take priority
+class AdmissionController:
+
+    def __init__(self):
+        self.interactive = AdmissionLane(
+            name='interactive',
+            limit=Config.INTERACTIVE_CONCURRENCY,
+            max_queue=Config.INTERACTIVE_QUEUE_SIZE,
+            queue_timeout_s=Config.INTERACTIVE_QUEUE_TIMEOUT_S,
+        )
+        self.bulk = AdmissionLane(
+            name='bulk',
+            limit=Config.BULK_CONCURRENCY,
+            max_queue=Config.BULK_QUEUE_SIZE,
+            queue_timeout_s=Config.BULK_QUEUE_TIMEOUT_S,
+        )
+
+    def lane_for(self, path: str) -> AdmissionLane | None:
+        if path in EXEMPT_PATHS:
+            return None
+        if path in BULK_PATHS:
+            return self.bulk
+        return self.interactive
+
+    async def yield_to_interactive(self) -> None:
+        # bulk work calls this between chunks: while interactive requests are queued it pauses
+        # (bounded, so imports are never starved) and leaves the event loop and CPU to them
+        await asyncio.sleep(0)
+        if self.interactive.waiting:
+            await self.interactive.wait_for_no_waiters(Config.BULK_YIELD_MAX_MS / 1000)
+
+    def stats(self) -> dict:
+        return {
+            'interactive': self.interactive.stats(),
+            'bulk': self.bulk.stats(),
+        }
+
+
+class AdmissionMiddleware:
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self._controller = controller
+
+    async def __call__(self, scope, receive, send):
+        lane = self._controller.lane_for(scope['path']) if scope['type'] == 'http' else None
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            started = await lane.acquire()
+        except Overloaded as exc:
+            response = JSONResponse(
+                status_code=429,
+                content={'detail': f'Too many {exc.lane} requests, retry later.'},
+                headers={'Retry-After': str(exc.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release(started)
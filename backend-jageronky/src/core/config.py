@@ -12,3 +12,37 @@ class Config:
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "")
 
     DB_URL: str = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+    # connection pool for interactive requests and background tasks; imports use their own pool
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+
+    # directory with one <STATE>.json rate file per state
+    TAX_RATES_PATH: str = os.getenv("TAX_RATES_PATH", "data/tax_rates")
+
+    # group commit for POST /orders; 0 disables the batcher
+    ORDER_BATCH_WINDOW_MS: float = float(os.getenv("ORDER_BATCH_WINDOW_MS", "0"))
+    ORDER_BATCH_MAX_SIZE: int = int(os.getenv("ORDER_BATCH_MAX_SIZE", "256"))
+    # an order still queued after this long is rejected with 503 instead of waiting on a stalled writer
+    ORDER_BATCH_QUEUE_TIMEOUT_S: float = float(os.getenv("ORDER_BATCH_QUEUE_TIMEOUT_S", "5"))
+
+    # points outside every county are snapped to the nearest boundary within this distance; 0 disables
+    BOUNDARY_SNAP_TOLERANCE_M: float = float(os.getenv("BOUNDARY_SNAP_TOLERANCE_M", "0"))
+
+    # how /orders/import computes taxes: "python" (TaxCalculationService) or "sql" (one INSERT ... SELECT per chunk)
+    IMPORT_TAX_ENGINE: str = os.getenv("IMPORT_TAX_ENGINE", "python")
+
+    # after SIGTERM a worker keeps serving, with /readyz at 503, for this long before it stops accepting;
+    # must be below GRACEFUL_TIMEOUT
+    PRE_STOP_DELAY_S: float = float(os.getenv("PRE_STOP_DELAY_S", "5"))
+    READY_PROBE_TIMEOUT_S: float = float(os.getenv("READY_PROBE_TIMEOUT_S", "1"))
+
+    # admission control, per worker; over the queue size or timeout requests get 429 + Retry-After
+    INTERACTIVE_CONCURRENCY: int = int(os.getenv("INTERACTIVE_CONCURRENCY", str(DB_POOL_SIZE)))
+    INTERACTIVE_QUEUE_SIZE: int = int(os.getenv("INTERACTIVE_QUEUE_SIZE", "100"))
+    INTERACTIVE_QUEUE_TIMEOUT_S: float = float(os.getenv("INTERACTIVE_QUEUE_TIMEOUT_S", "2"))
+    BULK_CONCURRENCY: int = int(os.getenv("BULK_CONCURRENCY", "2"))
+    BULK_QUEUE_SIZE: int = int(os.getenv("BULK_QUEUE_SIZE", "4"))
+    BULK_QUEUE_TIMEOUT_S: float = float(os.getenv("BULK_QUEUE_TIMEOUT_S", "30"))
+    # longest pause of an import between chunks while interactive requests are queued
+    BULK_YIELD_MAX_MS: float = float(os.getenv("BULK_YIELD_MAX_MS", "200"))
@@ -1,7 +1,22 @@
 from fastapi import Request
 
+from src.core.admission import AdmissionController
 from src.core.tax_config import TaxConfig
+from src.services.order_batcher import OrderWriteBatcher
+from src.services.change_feed import ChangeFeed
 
 
 def get_tax_config(request: Request) -> TaxConfig:
     return request.app.state.tax_config
+
+
+def get_order_batcher(request: Request) -> OrderWriteBatcher | None:
+    return request.app.state.order_batcher
+
+
+def get_change_feed(request: Request) -> ChangeFeed:
+    return request.app.state.change_feed
+
+
+def get_admission(request: Request) -> AdmissionController:
+    return request.app.state.admission
@@ -0,0 +1,52 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+# amounts are integer cents, rates are integer micro-units (0.04 -> 40000)
+CENT_DIGITS = 2
+MICRO_DIGITS = 6
+CENTS_PER_UNIT = 10 ** CENT_DIGITS
+MICROS_PER_UNIT = 10 ** MICRO_DIGITS
+
+# the range of the former numeric(12,2) column; keeps cents * rate_micros within bigint in the SQL tax engine
+MAX_SUBTOTAL_CENTS = 10 ** 12 - 1
+MAX_SUBTOTAL = MAX_SUBTOTAL_CENTS / CENTS_PER_UNIT
+
+
+def parse_fixed(value: str, digits: int) -> int:
+    text = value.strip()
+    sign = -1 if text.startswith('-') else 1
+    if text[:1] in ('-', '+'):
+        text = text[1:]
+
+    whole, _, frac = text.partition('.')
+    if not (whole or frac) or not (whole or '0').isdigit() or not (frac or '0').isdigit():
+        # exponent notation and anything unusual; rare, so Decimal is fine here
+        scaled = Decimal(value.strip()).scaleb(digits).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+        return int(scaled)
+
+    result = int(whole or '0') * 10 ** digits + int((frac + '0' * digits)[:digits])
+    if len(frac) > digits and frac[digits] >= '5':
+        result += 1
+
+    return sign * result
+
+
+def to_cents(value: str | float | int | Decimal) -> int:
+    # str() of a float is its shortest round-tripping form, so 19.99 parses as exactly 1999
+    return parse_fixed(str(value), CENT_DIGITS)
+
+
+def to_micros(value: str | float | int | Decimal) -> int:
+    return parse_fixed(str(value), MICRO_DIGITS)
+
+
+def apply_rate(cents: int, rate_micros: int) -> int:
+    # ROUND_HALF_UP of cents * rate, in integers only
+    return (cents * rate_micros + MICROS_PER_UNIT // 2) // MICROS_PER_UNIT
+
+
+def cents_to_float(cents: int) -> float:
+    return cents / CENTS_PER_UNIT
+
+
+def micros_to_float(micros: int) -> float:
+    return micros / MICROS_PER_UNIT
@@ -1,35 +1,86 @@
 import json
+from functools import lru_cache
 from pathlib import Path
 
+from src.core.money import to_micros
 
-class TaxConfig:
-    def __init__(self, path: str):
-        self._path = path
-        self._data = self._load()
 
-        self._state_rate = float(self._data["consts"]["state_rate"])
-        self._mctd_rate = float(self._data["consts"]["mctd_rate"])
-        self._mctd_counties = set(self._data["mctd_counties"])
+class StateTaxConfig:
+    def __init__(self, state: str, data: dict):
+        self._state = state
+        self._data = data
+
+        # all rates are kept as integer micro-units (0.04 -> 40000)
+        self._state_rate = to_micros(self._data["consts"]["state_rate"])
+        self._mctd_rate = to_micros(self._data["consts"].get("mctd_rate", 0))
+        self._mctd_counties = set(self._data.get("mctd_counties", []))
         self._counties = self._data["counties"]
-        self._cities_exceptions = self._data["cities_exceptions"]
+        self._cities_exceptions = self._data.get("cities_exceptions", {})
+
+        self._county_rates = {name: to_micros(c["county_rate"]) for name, c in self._counties.items()}
+        self._city_rates = {name: to_micros(c["city_rate"]) for name, c in self._cities_exceptions.items()}
 
-    def _load(self):
-        with open(Path(self._path), "r") as f:
-            return json.load(f)
+    @property
+    def state(self) -> str:
+        return self._state
 
     @property
-    def state_rate(self) -> float:
+    def state_rate(self) -> int:
         return self._state_rate
 
     @property
-    def mctd_rate(self) -> float:
+    def mctd_rate(self) -> int:
         return self._mctd_rate
 
+    @property
+    def county_rates(self) -> dict[str, int]:
+        return self._county_rates
+
+    @property
+    def city_rates(self) -> dict[str, int]:
+        return self._city_rates
+
     def get_county(self, name: str) -> dict | None:
         return self._counties.get(name)
 
+    def get_county_rate(self, name: str) -> int | None:
+        return self._county_rates.get(name)
+
     def is_mctd_county(self, name: str) -> bool:
         return name in self._mctd_counties
 
     def get_city_exception(self, name: str) -> dict | None:
         return self._cities_exceptions.get(name)
+
+    def get_city_rate(self, name: str) -> int | None:
+        return self._city_rates.get(name)
+
+
+class TaxConfig:
+    # one <STATE>.json per state in the rates directory, e.g. data/tax_rates/NY.json
+    def __init__(self, path: str):
+        self._path = path
+        self._states = {
+            state: StateTaxConfig(state, data)
+            for state, data in self._load().items()
+        }
+
+    def _load(self) -> dict[str, dict]:
+        configs = {}
+        for file in sorted(Path(self._path).glob("*.json")):
+            with open(file, "r") as f:
+                configs[file.stem.upper()] = json.load(f)
+        return configs
+
+    @property
+    def states(self) -> list[str]:
+        return list(self._states)
+
+    def get_state(self, state: str) -> StateTaxConfig | None:
+        return self._states.get(state)
+
+
+@lru_cache
+def load_tax_config(path: str) -> TaxConfig:
+    # loaded once per process; gunicorn --preload loads it in the master so workers share the pages
+    return TaxConfig(path)
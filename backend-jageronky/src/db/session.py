@@ -1,4 +1,7 @@
+import asyncio
+from contextlib import AsyncExitStack
 from typing import Any, AsyncGenerator
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from src.core.config import Config
@@ -6,6 +9,8 @@ from src.core.config import Config
 engine = create_async_engine(
     Config.DB_URL,
     pool_pre_ping=True,
+    pool_size=Config.DB_POOL_SIZE,
+    max_overflow=Config.DB_MAX_OVERFLOW,
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -13,6 +18,29 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# imports hold a connection for the whole upload; a separate pool keeps them from starving interactive requests
+bulk_engine = create_async_engine(
+    Config.DB_URL,
+    pool_pre_ping=True,
+    pool_size=Config.BULK_CONCURRENCY,
+    max_overflow=0,
+)
+
+BulkSessionLocal = async_sessionmaker(
+    bind=bulk_engine,
+    expire_on_commit=False,
+)
+
+# /readyz gets its own connection so a saturated interactive pool does not make the probe queue and time out
+probe_engine = create_async_engine(
+    Config.DB_URL,
+    pool_pre_ping=True,
+    pool_size=1,
+    max_overflow=0,
+    pool_timeout=Config.READY_PROBE_TIMEOUT_S,
+    connect_args={'timeout': Config.READY_PROBE_TIMEOUT_S},
+)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, Any]:
     async with AsyncSessionLocal() as session:
@@ -22,3 +50,76 @@ async def get_db() -> AsyncGenerator[AsyncSession, Any]:
         except Exception:
             await session.rollback()
             raise
+
+
+async def get_bulk_db() -> AsyncGenerator[AsyncSession, Any]:
+    async with BulkSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+# loads the boundary partitions (with their TOASTed polygons), their GiST indexes and the order indexes
+# behind listing and the change feed into shared buffers; skipped when pg_prewarm is not installed
+PREWARM_SQL = '''
+    SELECT pg_prewarm(rel::regclass)
+    FROM (
+        SELECT to_regclass(name)::oid AS rel
+        FROM unnest(ARRAY[
+            'state_extents',
+            'idx_state_extents_extent',
+            'orders_pkey',
+            'order_taxes_order_id_key',
+            'idx_order_taxes_change'
+        ]) name
+        UNION ALL
+        SELECT inhrelid FROM pg_inherits WHERE inhparent = 'idx_geo_boundaries_geom'::regclass
+        UNION ALL
+        SELECT c.oid FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'geo_boundaries'::regclass
+        UNION ALL
+        SELECT c.reltoastrelid FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'geo_boundaries'::regclass AND c.reltoastrelid <> 0
+    ) r
+    WHERE rel IS NOT NULL
+'''
+
+# one covered-point lookup per state: loads PostGIS into the backend and caches the partition catalog entries
+PROBE_SQL = '''
+    SELECT se.state, gb.name
+    FROM state_extents se
+    LEFT JOIN geo_boundaries gb ON gb.state = se.state
+        AND ST_Covers(gb.geom, ST_PointOnSurface(se.extent))
+'''
+
+
+async def check_db(warm_up: bool = False) -> bool:
+    try:
+        if warm_up:
+            await _warm_up()
+        else:
+            async with probe_engine.connect() as conn:
+                await asyncio.wait_for(conn.execute(text('SELECT 1')), Config.READY_PROBE_TIMEOUT_S)
+        return True
+    except Exception:
+        return False
+
+
+async def _warm_up() -> None:
+    async with engine.connect() as conn:
+        prewarm = await conn.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm')")
+        )
+        if prewarm.scalar_one():
+            await conn.execute(text(PREWARM_SQL))
+
+    # hold DB_POOL_SIZE connections at once so the pool opens all of them, and warm each backend
+    async with AsyncExitStack() as stack:
+        connections = [
+            await stack.enter_async_context(engine.connect())
+            for _ in range(Config.DB_POOL_SIZE)
+        ]
+        await asyncio.gather(*(conn.execute(text(PROBE_SQL)) for conn in connections))
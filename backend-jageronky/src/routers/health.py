@@ -0,0 +1,44 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
+
+from src.core.admission import AdmissionController
+from src.core.deps import get_admission
+from src.db.session import check_db
+
+router = APIRouter()
+
+
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz(request: Request):
+    state = request.app.state
+
+    if getattr(state, "draining", False):
+        return JSONResponse(status_code=503, content={"status": "draining"})
+
+    if not await check_db():
+        return JSONResponse(status_code=503, content={"status": "not ready", "database": "unreachable"})
+
+    if not getattr(state, "warm", False):
+        # warming holds every interactive connection, so it runs in the background instead of in the probe
+        task = getattr(state, "warm_up_task", None)
+        if task is None or task.done():
+            state.warm_up_task = asyncio.create_task(warm_up(state))
+        return JSONResponse(status_code=503, content={"status": "warming up"})
+
+    return {"status": "ready"}
+
+
+async def warm_up(state) -> None:
+    state.warm = await check_db(warm_up=True)
+
+
+@router.get("/admission")
+async def admission_stats(admission: AdmissionController = Depends(get_admission)):
+    return admission.stats()
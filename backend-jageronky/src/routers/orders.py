@@ -1,26 +1,49 @@
-from fastapi import APIRouter, UploadFile, Depends, File
+import asyncio
+import json
+import zlib
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, UploadFile, Depends, File, HTTPException, Path, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.tax_config import TaxConfig
-from src.db.session import get_db
-from src.core.deps import get_tax_config
-from src.schemas import OrderCreate, OrderOut, OrdersQuery, OrdersListOut
+from src.core.admission import AdmissionController
+from src.db.session import get_db, get_bulk_db
+from src.core.deps import get_tax_config, get_order_batcher, get_change_feed, get_admission
+from src.schemas import (
+    OrderCreate,
+    OrderOut,
+    OrdersQuery,
+    OrdersListOut,
+    OrdersMapQuery,
+    OrdersMapOut,
+    OrdersChangesQuery,
+    OrdersChangesOut,
+)
 from src.services.list_orders import ListOrdersService
 from src.services.create_orders import CreateOrderService
 from src.services.import_orders import ImportService
+from src.services.map_orders import MapOrdersService
+from src.services.order_batcher import OrderWriteBatcher
+from src.services.change_feed import ChangeFeed
 
 router = APIRouter()
 
+SSE_HEARTBEAT_SECONDS = 15
+
 
 @router.post("/import")
 async def import_orders(
         file: UploadFile = File(...),
         tax_config: TaxConfig = Depends(get_tax_config),
-        db: AsyncSession = Depends(get_db)
+        admission: AdmissionController = Depends(get_admission),
+        db: AsyncSession = Depends(get_bulk_db)
 ):
     content = await file.read()
 
-    service = ImportService(db, tax_config)
+    service = ImportService(db, tax_config, between_chunks=admission.yield_to_interactive)
 
     return await service.import_orders(
         file_name=file.filename,
@@ -31,18 +54,112 @@ async def import_orders(
 async def create_orders(
         dto: OrderCreate,
         tax_config: TaxConfig = Depends(get_tax_config),
+        batcher: OrderWriteBatcher | None = Depends(get_order_batcher),
         db: AsyncSession = Depends(get_db)
 ):
+    if batcher is not None:
+        return await batcher.submit(dto)
+
     service = CreateOrderService(db, tax_config)
     return await service.create_order(dto)
 
 
 @router.get("", response_model=OrdersListOut)
 async def get_orders(
+        request: Request,
+        response: Response,
         query: OrdersQuery = Depends(),
+        change_feed: ChangeFeed = Depends(get_change_feed),
         db: AsyncSession = Depends(get_db)
 ):
+    version = change_feed.version
+    if version is not None:
+        etag = f'W/"{version}-{zlib.crc32(request.url.query.encode()):x}"'
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
     service = ListOrdersService(db)
 
     items, total = await service.list_orders(limit=query.limit, offset=query.offset)
     return OrdersListOut(items=items, total=total, limit=query.limit, offset=query.offset)
+
+
+@router.get("/map", response_model=OrdersMapOut)
+async def get_orders_map(
+        query: OrdersMapQuery = Depends(),
+        db: AsyncSession = Depends(get_db)
+):
+    service = MapOrdersService(db)
+
+    items, cell_size = await service.get_clusters(
+        min_lat=query.min_lat,
+        min_lon=query.min_lon,
+        max_lat=query.max_lat,
+        max_lon=query.max_lon,
+        zoom=query.zoom,
+    )
+    return OrdersMapOut(items=items, zoom=query.zoom, cell_size=cell_size)
+
+
+@router.get("/tiles/{z}/{x}/{y}.mvt")
+async def get_orders_tile(
+        z: int = Path(..., ge=0, le=22),
+        x: int = Path(..., ge=0),
+        y: int = Path(..., ge=0),
+        db: AsyncSession = Depends(get_db)
+):
+    if x >= 1 << z or y >= 1 << z:
+        raise HTTPException(status_code=404, detail="tile out of range")
+
+    service = MapOrdersService(db)
+
+    tile = await service.get_tile(z=z, x=x, y=y)
+    return Response(content=tile, media_type="application/vnd.mapbox-vector-tile")
+
+
+@router.get("/changes", response_model=OrdersChangesOut)
+async def get_orders_changes(
+        query: OrdersChangesQuery = Depends(),
+        db: AsyncSession = Depends(get_db)
+):
+    service = ListOrdersService(db)
+
+    items, cursor = await service.list_changes(since=query.since, limit=query.limit)
+    return OrdersChangesOut(items=items, cursor=cursor)
+
+
+@router.get("/stream")
+async def stream_orders(
+        change_feed: ChangeFeed = Depends(get_change_feed),
+):
+    if change_feed.version is None:
+        raise HTTPException(status_code=503, detail="change feed unavailable")
+
+    queue = await change_feed.subscribe()
+
+    return StreamingResponse(
+        _order_events(change_feed, queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _order_events(change_feed: ChangeFeed, queue: asyncio.Queue) -> AsyncIterator[str]:
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            if event is None:
+                break
+
+            items, cursor = event
+            yield f"id: {cursor}\nevent: orders\ndata: {json.dumps(jsonable_encoder(items))}\n\n"
+    finally:
+        change_feed.unsubscribe(queue)
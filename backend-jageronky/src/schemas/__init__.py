@@ -1 +1,10 @@
-from .orders import OrderCreate, OrderOut, OrdersQuery, OrdersListOut
\ No newline at end of file
+from .orders import (
+    OrderCreate,
+    OrderOut,
+    OrdersQuery,
+    OrdersListOut,
+    OrdersMapQuery,
+    OrdersMapOut,
+    OrdersChangesQuery,
+    OrdersChangesOut,
+)
\ No newline at end of file
@@ -1,13 +1,19 @@
 from pydantic import BaseModel, Field
 import datetime as dt
 
+from src.core.money import MAX_SUBTOTAL, to_cents
+
 
 class OrderBase(BaseModel):
     latitude: float = Field(..., ge=-90, le=90)
     longitude: float = Field(..., ge=-180, le=180)
-    subtotal: float = Field(..., ge=0)
+    subtotal: float = Field(..., ge=0, le=MAX_SUBTOTAL)
     timestamp: dt.datetime = Field(..., description="ISO datetime, e.g. 2026-02-23T10:15:00Z")
 
+    @property
+    def subtotal_cents(self) -> int:
+        return to_cents(self.subtotal)
+
 
 class OrderCreate(OrderBase):
     pass
@@ -25,6 +31,7 @@ class Jurisdictions(BaseModel):
     county: str | None = None
     city: str | None = None
     special: list[str] = Field(default_factory=list)
+    snapped: bool = Field(False, description="point was outside all boundaries and snapped to the nearest one")
 
 
 class OrderOut(OrderBase):
@@ -54,3 +61,35 @@ class OrdersListOut(BaseModel):
     total: int
     limit: int
     offset: int
+
+
+class OrdersMapQuery(BaseModel):
+    min_lat: float = Field(..., ge=-90, le=90)
+    min_lon: float = Field(..., ge=-180, le=180)
+    max_lat: float = Field(..., ge=-90, le=90)
+    max_lon: float = Field(..., ge=-180, le=180)
+    zoom: int = Field(..., ge=0, le=22, description="leaflet zoom level of the viewport")
+
+
+class MapCluster(BaseModel):
+    latitude: float
+    longitude: float
+    count: int = Field(..., ge=1, description="orders aggregated into this grid cell")
+    order_id: int | None = Field(None, description="set only when the cell holds a single order")
+    total_amount: float = Field(..., ge=0)
+
+
+class OrdersMapOut(BaseModel):
+    items: list[MapCluster]
+    zoom: int
+    cell_size: float = Field(..., description="grid cell size in degrees")
+
+
+class OrdersChangesQuery(BaseModel):
+    since: str = Field("0.0", pattern=r"^\d+\.\d+$", description="cursor returned by the previous call")
+    limit: int = Field(200, ge=1, le=1000)
+
+
+class OrdersChangesOut(BaseModel):
+    items: list[OrderOut]
+    cursor: str
@@ -0,0 +1,204 @@
+import asyncio
+import contextlib
+import secrets
+
+import asyncpg
+
+from src.core.config import Config
+from src.db.session import AsyncSessionLocal
+from src.services.list_orders import ListOrdersService
+
+CHANNEL = 'order_changes'
+SUBSCRIBER_QUEUE_SIZE = 100
+PUBLISH_BATCH_SIZE = 500
+
+RECONNECT_MIN_S = 0.5
+RECONNECT_MAX_S = 30
+# an idle LISTEN connection may die silently; ping it so the reconnect loop notices
+PING_INTERVAL_S = 30
+PING_TIMEOUT_S = 5
+
+# rows held back behind a still-open older transaction are retried on this backoff
+PUBLISH_RETRY_MIN_S = 0.2
+PUBLISH_RETRY_MAX_S = 15
+
+
+# keeps one LISTEN connection per process: the orders version used for ETags is updated from
+# notifications (no query per poll), and new rows are fetched once per change and fanned out to SSE subscribers
+class ChangeFeed:
+
+    def __init__(self):
+        self._conn: asyncpg.Connection | None = None
+        # order ids and now() are fixed before commit, so no column maximum follows commit order;
+        # the version is a per-process generation bumped on every notification instead
+        self._nonce = secrets.token_hex(4)
+        self._generation = 0
+        self._cursor: str | None = None
+        self._subscribers: set[asyncio.Queue] = set()
+        self._publish_lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+        self._terminated = asyncio.Event()
+        self._run_task: asyncio.Task | None = None
+        self._retry_handle: asyncio.TimerHandle | None = None
+        self._retry_delay = PUBLISH_RETRY_MIN_S
+
+    @property
+    def version(self) -> str | None:
+        # None while not listening; callers must not serve cached responses then.
+        # Another worker has another nonce, which only costs the client a full response
+        return f'{self._nonce}.{self._generation}' if self._conn is not None else None
+
+    async def start(self) -> None:
+        self._run_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._run_task is not None:
+            self._run_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._run_task
+            self._run_task = None
+
+        if self._retry_handle is not None:
+            self._retry_handle.cancel()
+            self._retry_handle = None
+
+        for queue in self._subscribers:
+            self._close(queue)
+
+        await self._disconnect()
+
+    async def subscribe(self) -> asyncio.Queue:
+        if not self._subscribers:
+            # nobody was listening, so the cursor is stale; the new subscriber starts from now
+            async with AsyncSessionLocal() as db:
+                self._cursor = await ListOrdersService(db).current_cursor()
+
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    async def _run(self) -> None:
+        delay = RECONNECT_MIN_S
+
+        while True:
+            try:
+                await self._connect()
+            except Exception:
+                await self._disconnect()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_S)
+                continue
+
+            delay = RECONNECT_MIN_S
+
+            # changes committed while we were not listening were never notified
+            if self._subscribers:
+                self._schedule_publish()
+
+            await self._wait_terminated()
+            await self._disconnect()
+
+    async def _connect(self) -> None:
+        self._terminated.clear()
+
+        conn = await asyncpg.connect(
+            host=Config.DB_HOST,
+            port=Config.DB_PORT,
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            database=Config.DB_NAME,
+        )
+        self._conn = conn
+        await conn.add_listener(CHANNEL, self._on_notify)
+        conn.add_termination_listener(self._on_terminate)
+
+        # notifications may have been missed while disconnected
+        self._generation += 1
+
+    async def _wait_terminated(self) -> None:
+        while not self._terminated.is_set():
+            try:
+                await asyncio.wait_for(self._terminated.wait(), PING_INTERVAL_S)
+            except asyncio.TimeoutError:
+                try:
+                    await asyncio.wait_for(self._conn.execute('SELECT 1'), PING_TIMEOUT_S)
+                except Exception:
+                    return
+
+    async def _disconnect(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            conn.terminate()
+
+    def _on_notify(self, conn, pid, channel, payload: str) -> None:
+        self._generation += 1
+
+        if self._subscribers:
+            self._schedule_publish()
+
+    def _on_terminate(self, conn) -> None:
+        if conn is self._conn:
+            self._conn = None
+        self._terminated.set()
+
+    def _schedule_publish(self) -> None:
+        task = asyncio.create_task(self._publish())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _publish(self) -> None:
+        try:
+            async with self._publish_lock:
+                async with AsyncSessionLocal() as db:
+                    service = ListOrdersService(db)
+
+                    while self._subscribers:
+                        items, cursor = await service.list_changes(since=self._cursor, limit=PUBLISH_BATCH_SIZE)
+                        self._cursor = cursor
+
+                        if items:
+                            self._broadcast((items, cursor))
+                        if len(items) < PUBLISH_BATCH_SIZE:
+                            break
+
+                    # committed rows beyond the cursor are held back by an older open transaction;
+                    # nothing may notify again once it ends, so poll until they are released
+                    held_back = bool(self._subscribers) and await service.has_changes_after(self._cursor)
+        except Exception:
+            held_back = bool(self._subscribers)
+
+        if held_back:
+            self._retry_publish()
+        else:
+            self._retry_delay = PUBLISH_RETRY_MIN_S
+
+    def _retry_publish(self) -> None:
+        if self._retry_handle is not None:
+            return
+
+        delay = self._retry_delay
+        self._retry_delay = min(delay * 2, PUBLISH_RETRY_MAX_S)
+        self._retry_handle = asyncio.get_running_loop().call_later(delay, self._on_retry)
+
+    def _on_retry(self) -> None:
+        self._retry_handle = None
+        if self._subscribers:
+            self._schedule_publish()
+
+    def _broadcast(self, event: tuple[list[dict], str]) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # slow consumer: close its stream, it can catch up through /orders/changes
+                self._subscribers.discard(queue)
+                self._close(queue)
+
+    @staticmethod
+    def _close(queue: asyncio.Queue) -> None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(None)
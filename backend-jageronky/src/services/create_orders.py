@@ -1,5 +1,3 @@
-from decimal import Decimal
-
 from fastapi import HTTPException
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.tax_config import TaxConfig
 from src.schemas.orders import OrderCreate
 from src.services.jurisdiction import JurisdictionService
+from src.services.list_orders import order_out_from_row
 from src.services.tax_calculation import TaxCalculationService
 
 
@@ -26,13 +25,15 @@ class CreateOrderService:
             longitude=dto.longitude,
         )
 
-        county, city = resolved if resolved is not None else (None, None)
+        state, county, city, snapped = resolved if resolved is not None else (None, None, None, False)
 
         tax_record = self._tax_service.build_order_tax_record(
             order_id=order_id,
-            subtotal=Decimal(str(dto.subtotal)),
+            subtotal_cents=dto.subtotal_cents,
+            state=state,
             county=county,
             city=city,
+            snapped=snapped,
         )
 
         await self._insert_order_tax(tax_record)
@@ -60,14 +61,14 @@ class CreateOrderService:
                     source,
                     latitude,
                     longitude,
-                    subtotal,
+                    subtotal_cents,
                     ordered_dt
                 )
                 VALUES (
                     'manual',
                     :latitude,
                     :longitude,
-                    :subtotal,
+                    :subtotal_cents,
                     :ordered_dt
                 )
                 RETURNING id
@@ -75,7 +76,7 @@ class CreateOrderService:
             {
                 'latitude': dto.latitude,
                 'longitude': dto.longitude,
-                'subtotal': dto.subtotal,
+                'subtotal_cents': dto.subtotal_cents,
                 'ordered_dt': dto.timestamp,
             },
         )
@@ -87,12 +88,12 @@ class CreateOrderService:
                 INSERT INTO order_taxes (
                     order_id,
                     status,
-                    composite_tax_rate,
-                    tax_amount,
-                    total_amount,
-                    state_rate,
-                    county_rate,
-                    city_rate,
+                    composite_rate_micros,
+                    tax_amount_cents,
+                    total_amount_cents,
+                    state_rate_micros,
+                    county_rate_micros,
+                    city_rate_micros,
                     special_rates,
                     jurisdictions,
                     error_text
@@ -100,12 +101,12 @@ class CreateOrderService:
                 VALUES (
                     :order_id,
                     :status,
-                    :composite_tax_rate,
-                    :tax_amount,
-                    :total_amount,
-                    :state_rate,
-                    :county_rate,
-                    :city_rate,
+                    :composite_rate_micros,
+                    :tax_amount_cents,
+                    :total_amount_cents,
+                    :state_rate_micros,
+                    :county_rate_micros,
+                    :city_rate_micros,
                     CAST(:special_rates AS jsonb),
                     CAST(:jurisdictions AS jsonb),
                     :error_text
@@ -114,12 +115,12 @@ class CreateOrderService:
             {
                 'order_id': tax_record[0],
                 'status': tax_record[1],
-                'composite_tax_rate': tax_record[2],
-                'tax_amount': tax_record[3],
-                'total_amount': tax_record[4],
-                'state_rate': tax_record[5],
-                'county_rate': tax_record[6],
-                'city_rate': tax_record[7],
+                'composite_rate_micros': tax_record[2],
+                'tax_amount_cents': tax_record[3],
+                'total_amount_cents': tax_record[4],
+                'state_rate_micros': tax_record[5],
+                'county_rate_micros': tax_record[6],
+                'city_rate_micros': tax_record[7],
                 'special_rates': tax_record[8],
                 'jurisdictions': tax_record[9],
                 'error_text': tax_record[10],
@@ -133,14 +134,14 @@ class CreateOrderService:
                     o.id,
                     o.latitude,
                     o.longitude,
-                    o.subtotal,
+                    o.subtotal_cents,
                     o.ordered_dt AS timestamp,
-                    t.composite_tax_rate,
-                    t.tax_amount,
-                    t.total_amount,
-                    t.state_rate,
-                    t.county_rate,
-                    t.city_rate,
+                    t.composite_rate_micros,
+                    t.tax_amount_cents,
+                    t.total_amount_cents,
+                    t.state_rate_micros,
+                    t.county_rate_micros,
+                    t.city_rate_micros,
                     t.special_rates,
                     t.jurisdictions
                 FROM orders o
@@ -156,23 +157,7 @@ class CreateOrderService:
         if row is None:
             return None
 
-        return {
-            'id': row['id'],
-            'latitude': float(row['latitude']),
-            'longitude': float(row['longitude']),
-            'subtotal': float(row['subtotal']),
-            'timestamp': row['timestamp'],
-            'composite_tax_rate': float(row['composite_tax_rate']),
-            'tax_amount': float(row['tax_amount']),
-            'total_amount': float(row['total_amount']),
-            'breakdown': {
-                'state_rate': float(row['state_rate']),
-                'county_rate': float(row['county_rate']),
-                'city_rate': float(row['city_rate']),
-                'special_rates': row['special_rates'] or [],
-            },
-            'jurisdictions': row['jurisdictions'],
-        }
+        return order_out_from_row(row)
 
     async def _fetch_failed_tax(self, order_id: int) -> dict | None:
         result = await self._db.execute(
@@ -210,14 +195,14 @@ async def list_orders(
                 o.id,
                 o.latitude,
                 o.longitude,
-                o.subtotal,
+                o.subtotal_cents,
                 o.ordered_dt AS timestamp,
-                t.composite_tax_rate,
-                t.tax_amount,
-                t.total_amount,
-                t.state_rate,
-                t.county_rate,
-                t.city_rate,
+                t.composite_rate_micros,
+                t.tax_amount_cents,
+                t.total_amount_cents,
+                t.state_rate_micros,
+                t.county_rate_micros,
+                t.city_rate_micros,
                 t.special_rates,
                 t.jurisdictions
             FROM orders o
@@ -229,26 +214,6 @@ async def list_orders(
         {'limit': limit, 'offset': offset},
     )
 
-    rows = result.mappings().all()
-
-    items = []
-    for row in rows:
-        items.append({
-            'id': row['id'],
-            'latitude': float(row['latitude']),
-            'longitude': float(row['longitude']),
-            'subtotal': float(row['subtotal']),
-            'timestamp': row['timestamp'],
-            'composite_tax_rate': float(row['composite_tax_rate']) if row['composite_tax_rate'] is not None else None,
-            'tax_amount': float(row['tax_amount']),
-            'total_amount': float(row['total_amount']),
-            'breakdown': {
-                'state_rate': float(row['state_rate']),
-                'county_rate': float(row['county_rate']),
-                'city_rate': float(row['city_rate']),
-                'special_rates': row['special_rates'] or [],
-            },
-            'jurisdictions': row['jurisdictions'],
-        })
+    items = [order_out_from_row(row) for row in result.mappings().all()]
 
     return items, total
@@ -1,15 +1,28 @@
+import asyncio
 import csv
+import functools
 import hashlib
 import io
+import json
+from collections.abc import Awaitable, Callable, Iterable, Iterator
 from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
 
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+from fastapi import HTTPException
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.config import Config
+from src.core.money import CENTS_PER_UNIT, MAX_SUBTOTAL_CENTS, to_cents
 from src.core.tax_config import TaxConfig
 from src.services.tax_calculation import TaxCalculationService
+from src.services.tax_rate_tables import TaxRateTablesService
 from src.services.jurisdiction import JurisdictionService
 
 
@@ -18,93 +31,223 @@ class ParsedOrderRow:
     source_order_id: int
     latitude: float
     longitude: float
-    subtotal: Decimal
+    subtotal_cents: int
     ordered_dt: datetime
 
 
+@dataclass(slots=True)
+class FailedOrderRow:
+    line_number: int
+    reason: str
+
+
 @dataclass(slots=True)
 class ParseSummary:
     total_rows: int
     valid_rows: list[ParsedOrderRow]
-    failed_rows: int
+    failed_rows: list[FailedOrderRow]
+    # accepted rows of a columnar chunk, kept as Arrow columns instead of ParsedOrderRow objects
+    valid_batch: pa.RecordBatch | None = None
+
+    @property
+    def valid_count(self) -> int:
+        if self.valid_batch is not None:
+            return self.valid_batch.num_rows
+        return len(self.valid_rows)
+
+
+@dataclass(slots=True)
+class OrderBatches:
+    batches: Iterable[pa.RecordBatch]
+    # one flag per row of the file: the row repeats an id seen earlier in the file
+    duplicates: pa.Array
+
+
+CHUNK_SIZE = 5000
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+PARQUET_MAGIC = b'PAR1'
+ARROW_FILE_MAGIC = b'ARROW1'
+ARROW_STREAM_MAGIC = b'\xff\xff\xff\xff'
+
+# column name -> arrow type that maps 1:1 onto ParsedOrderRow fields (subtotal becomes int64 cents)
+ORDER_COLUMNS = {
+    'id': pa.int64(),
+    'latitude': pa.float64(),
+    'longitude': pa.float64(),
+    'subtotal': pa.decimal128(12, 2),
+    'timestamp': pa.timestamp('us', tz='UTC'),
+}
+CENTS_SCALAR = pa.scalar(Decimal(CENTS_PER_UNIT), pa.decimal128(3, 0))
+
+SUBTOTAL_TOO_LARGE = f'subtotal must not exceed {MAX_SUBTOTAL_CENTS // CENTS_PER_UNIT}.99'
+
+ORDER_COPY_COLUMNS = [
+    'id',
+    'source',
+    'import_id',
+    'source_order_id',
+    'latitude',
+    'longitude',
+    'subtotal_cents',
+    'ordered_dt',
+]
+
+# raised by corrupt or truncated files (bad compression frames, Parquet pages, IPC messages, encodings)
+UNREADABLE_FILE_ERRORS = (pa.ArrowException, OSError, EOFError, UnicodeDecodeError, csv.Error)
 
 
 class ImportService:
 
-    def __init__(self, db: AsyncSession, tax_config: TaxConfig):
+    def __init__(
+        self,
+        db: AsyncSession,
+        tax_config: TaxConfig,
+        tax_engine: str | None = None,
+        between_chunks: Callable[[], Awaitable[None]] | None = None,
+    ):
         self._db = db
         self._tax_config = tax_config
         self._tax_service = TaxCalculationService(tax_config)
+        self._tax_engine = tax_engine or Config.IMPORT_TAX_ENGINE
+        self._between_chunks = between_chunks
 
     async def import_orders(
         self,
         file_name: str,
         file_bytes: bytes,
     ) -> dict:
-        file_hash = hashlib.sha256(file_bytes).hexdigest()
+        # hashing, decompression, parsing and the tax loop are CPU-bound; they run in worker threads so
+        # the event loop keeps serving other requests (pyarrow and hashlib also release the GIL)
+        file_hash = await asyncio.to_thread(self._hash_file, file_bytes)
 
-        existing_id = await self._find_existing_import(file_hash)
-        if existing_id is not None:
+        existing = await self._find_existing_import(file_hash)
+        if existing is not None and existing['status'] == 'completed':
             return {'message': 'file already imported'}
 
-        parsed = self._parse_csv(file_bytes)
+        # a file that cannot even be opened is rejected before any import record is written
+        try:
+            rows = await asyncio.to_thread(self._read_rows, (file_name or '').lower(), file_bytes)
+        except UNREADABLE_FILE_ERRORS as exc:
+            raise HTTPException(
+                status_code=400,
+                detail=f'file could not be read: {type(exc).__name__}: {exc}',
+            ) from None
+
+        if existing is None:
+            import_id = await self._create_import_record(
+                file_name=file_name,
+                file_hash=file_hash,
+            )
+            checkpoint_row = 0
+        else:
+            import_id = existing['id']
+            checkpoint_row = existing['checkpoint_row']
+
+        resumed_from_row = checkpoint_row
 
-        import_id = await self._create_import_record(
-            file_name=file_name,
-            file_hash=file_hash,
-        )
+        chunks = self._parse_file(rows, start_row=checkpoint_row)
 
-        if parsed.valid_rows:
-            await self._bulk_insert_orders(
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+            await self._import_chunk(
                 import_id=import_id,
-                rows=parsed.valid_rows,
+                checkpoint_row=checkpoint_row,
+                chunk=chunk,
             )
+            checkpoint_row += chunk.total_rows
+
+            if self._between_chunks is not None:
+                await self._between_chunks()
+
+        await self._complete_import(import_id)
+
+        stats = await self._fetch_import_stats(import_id)
+
+        return {
+            'status': 'success',
+            'import_id': import_id,
+            'resumed_from_row': resumed_from_row,
+            'total_rows': stats['total_rows'],
+            'inserted_rows': stats['inserted_rows'],
+            'failed_rows': stats['failed_rows'],
+            'taxes_created': stats['taxes_calculated'] + stats['taxes_failed'],
+            'taxes_calculated': stats['taxes_calculated'],
+            'taxes_failed': stats['taxes_failed'],
+        }
+
+    async def _import_chunk(
+        self,
+        import_id: int,
+        checkpoint_row: int,
+        chunk: ParseSummary,
+    ) -> None:
+        await self._lock_checkpoint(import_id, checkpoint_row)
 
+        order_ids: list[int] = []
+        if chunk.valid_batch is not None and chunk.valid_batch.num_rows:
+            order_ids = await self._copy_order_batch(
+                import_id=import_id,
+                batch=chunk.valid_batch,
+            )
+        elif chunk.valid_rows:
+            order_ids = await self._bulk_insert_orders(
+                import_id=import_id,
+                rows=chunk.valid_rows,
+            )
+
+        if chunk.failed_rows:
+            await self._bulk_insert_import_errors(
+                import_id=import_id,
+                rows=chunk.failed_rows,
+            )
+
+        # only this chunk's orders: earlier chunks were committed together with their taxes
+        if order_ids and self._tax_engine == 'sql':
+            await TaxRateTablesService(self._db).calculate_for_import(order_ids)
+        elif order_ids:
+            await self._calculate_taxes(order_ids)
+
+        await self._update_import_stats(
+            import_id=import_id,
+            checkpoint_row=checkpoint_row + chunk.total_rows,
+            total_rows=chunk.total_rows,
+            inserted_rows=chunk.valid_count,
+            failed_rows=len(chunk.failed_rows),
+        )
+
+        await self._db.commit()
+
+    async def _calculate_taxes(self, order_ids: list[int]) -> None:
         orders_with_jurisdictions = await JurisdictionService.resolve_for_import(
             db=self._db,
-            import_id=import_id,
+            order_ids=order_ids,
         )
 
-        tax_records = [
+        tax_records = await asyncio.to_thread(self._build_tax_records, orders_with_jurisdictions)
+
+        if tax_records:
+            await self._bulk_insert_order_taxes(records=tax_records)
+
+    def _build_tax_records(self, orders_with_jurisdictions: list[dict]) -> list[tuple]:
+        return [
             self._tax_service.build_order_tax_record(
                 order_id=row['id'],
-                subtotal=Decimal(str(row['subtotal'])),
+                subtotal_cents=row['subtotal_cents'],
+                state=row['state'],
                 county=row['county_name'],
                 city=row['city_name'],
+                snapped=row['snapped'],
             )
             for row in orders_with_jurisdictions
         ]
 
-        if tax_records:
-            await self._bulk_insert_order_taxes(records=tax_records)
-
-        await self._update_import_stats(
-            import_id=import_id,
-            total_rows=parsed.total_rows,
-            inserted_rows=len(parsed.valid_rows),
-            failed_rows=parsed.failed_rows,
-        )
-
-        taxes_calculated = sum(1 for record in tax_records if record[1] == 'calculated')
-        taxes_failed = sum(1 for record in tax_records if record[1] == 'failed')
-
-        return {
-            'status': 'success',
-            'import_id': import_id,
-            'total_rows': parsed.total_rows,
-            'inserted_rows': len(parsed.valid_rows),
-            'failed_rows': parsed.failed_rows,
-            'taxes_created': len(tax_records),
-            'taxes_calculated': taxes_calculated,
-            'taxes_failed': taxes_failed,
-        }
-
-    async def _find_existing_import(self, file_hash: str) -> int | None:
+    async def _find_existing_import(self, file_hash: str) -> dict | None:
         result = await self._db.execute(
-            text('''SELECT id FROM imports WHERE file_sha256 = :hash'''),
+            text('''SELECT id, status, checkpoint_row FROM imports WHERE file_sha256 = :hash'''),
             {'hash': file_hash},
         )
-        return result.scalar_one_or_none()
+        return result.mappings().first()
 
     async def _create_import_record(self, file_name: str, file_hash: str) -> int:
         result = await self._db.execute(
@@ -121,47 +264,351 @@ class ImportService:
         await self._db.commit()
         return result.scalar_one()
 
+    async def _lock_checkpoint(self, import_id: int, checkpoint_row: int) -> None:
+        result = await self._db.execute(
+            text('''
+                SELECT checkpoint_row
+                FROM imports
+                WHERE id = :import_id
+                FOR UPDATE
+            '''),
+            {'import_id': import_id},
+        )
+        if result.scalar_one() != checkpoint_row:
+            raise HTTPException(
+                status_code=409,
+                detail='import is being processed by another request',
+            )
+
     @staticmethod
-    def _parse_csv(file_bytes: bytes) -> ParseSummary:
-        decoded = file_bytes.decode('utf-8')
-        reader = csv.DictReader(io.StringIO(decoded))
+    def _hash_file(file_bytes: bytes) -> str:
+        return hashlib.sha256(file_bytes).hexdigest()
 
-        valid_rows: list[ParsedOrderRow] = []
-        total_rows = 0
+    @staticmethod
+    def _parse_file(
+        source: Iterator[tuple[int, ParsedOrderRow | Exception]] | OrderBatches,
+        start_row: int = 0,
+    ) -> Iterator[ParseSummary]:
+        if isinstance(source, OrderBatches):
+            return ImportService._parse_batches(source, start_row)
+        return ImportService._parse_rows(source, start_row)
 
-        for raw_row in reader:
-            total_rows += 1
+    @staticmethod
+    def _parse_rows(
+        rows: Iterator[tuple[int, ParsedOrderRow | Exception]],
+        start_row: int = 0,
+    ) -> Iterator[ParseSummary]:
+        rows = ImportService._stop_at_unreadable(rows)
+
+        seen_ids: set[int] = set()
+        chunk = ParseSummary(total_rows=0, valid_rows=[], failed_rows=[])
+
+        for row_index, (line_number, parsed) in enumerate(rows):
+            if isinstance(parsed, ParsedOrderRow):
+                # a rejected row still claims its id, like in the columnar duplicate mask
+                source_order_id = parsed.source_order_id
+                try:
+                    ImportService._validate_row(parsed)
+                    if source_order_id in seen_ids:
+                        raise ValueError(f'duplicate id {source_order_id}')
+                except ValueError as exc:
+                    parsed = exc
+                seen_ids.add(source_order_id)
+
+            if row_index < start_row:
+                continue
+
+            chunk.total_rows += 1
+            if isinstance(parsed, ParsedOrderRow):
+                chunk.valid_rows.append(parsed)
+            else:
+                chunk.failed_rows.append(FailedOrderRow(
+                    line_number=line_number,
+                    reason=f'{type(parsed).__name__}: {parsed}',
+                ))
+
+            if chunk.total_rows == CHUNK_SIZE:
+                yield chunk
+                chunk = ParseSummary(total_rows=0, valid_rows=[], failed_rows=[])
+
+        if chunk.total_rows:
+            yield chunk
+
+    @staticmethod
+    def _parse_batches(source: OrderBatches, start_row: int = 0) -> Iterator[ParseSummary]:
+        # every batch holds at most CHUNK_SIZE rows and becomes one chunk
+        first_row = 0
+        batches = iter(source.batches)
 
+        while True:
             try:
-                parsed = ParsedOrderRow(
-                    source_order_id=int(raw_row['id']),
-                    latitude=float(raw_row['latitude']),
-                    longitude=float(raw_row['longitude']),
-                    subtotal=Decimal(str(raw_row['subtotal'])),
-                    ordered_dt=datetime.fromisoformat(raw_row['timestamp'].replace('Z', '+00:00')),
+                batch = next(batches, None)
+            except UNREADABLE_FILE_ERRORS as exc:
+                if first_row >= start_row:
+                    yield ParseSummary(total_rows=1, valid_rows=[], failed_rows=[FailedOrderRow(
+                        line_number=first_row + 1,
+                        reason=f'ValueError: file is unreadable from this row on ({type(exc).__name__}: {exc})',
+                    )])
+                return
+
+            if batch is None:
+                return
+
+            offset = max(start_row - first_row, 0)
+            if offset < batch.num_rows:
+                yield ImportService._validate_batch(
+                    batch.slice(offset),
+                    first_row=first_row + offset,
+                    duplicates=source.duplicates.slice(first_row + offset, batch.num_rows - offset),
                 )
-                valid_rows.append(parsed)
-            except Exception:
-                continue
+            first_row += batch.num_rows
+
+    @staticmethod
+    def _validate_batch(batch: pa.RecordBatch, first_row: int, duplicates: pa.Array) -> ParseSummary:
+        try:
+            columns = {
+                name: ImportService._cast_column(name, ImportService._batch_column(batch, name))
+                for name in ORDER_COLUMNS
+            }
+        except (KeyError, pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # the batch does not cast cleanly; fall back to per-row parsing to report each bad row
+            return ImportService._validate_batch_rows(batch, first_row, duplicates)
+
+        # one mask per rejection reason, in the order _validate_row checks them; a row takes the first that applies
+        checks = [
+            ('missing value', functools.reduce(pc.or_, [pc.is_null(column) for column in columns.values()])),
+            ('latitude out of range', ImportService._outside(columns['latitude'], -90, 90)),
+            ('longitude out of range', ImportService._outside(columns['longitude'], -180, 180)),
+            ('subtotal must be non-negative', pc.fill_null(pc.less(columns['subtotal'], 0), False)),
+            (SUBTOTAL_TOO_LARGE, pc.fill_null(pc.greater(columns['subtotal'], MAX_SUBTOTAL_CENTS), False)),
+            ('duplicate id', duplicates),
+        ]
+        rejected = functools.reduce(pc.or_, [mask for _, mask in checks])
+
+        failed_rows = []
+        if pc.any(rejected).as_py():
+            # only the rejected rows are turned into Python values
+            rejected_indices = pc.indices_nonzero(rejected)
+            flags = [pc.take(mask, rejected_indices).to_pylist() for _, mask in checks]
+            source_order_ids = pc.take(columns['id'], rejected_indices).to_pylist()
+
+            for index, source_order_id, *row_flags in zip(rejected_indices.to_pylist(), source_order_ids, *flags):
+                reason = next(reason for (reason, _), flag in zip(checks, row_flags) if flag)
+                if reason == 'duplicate id':
+                    reason = f'duplicate id {source_order_id}'
+                failed_rows.append(FailedOrderRow(line_number=first_row + index + 1, reason=f'ValueError: {reason}'))
+
+            accepted = pc.invert(rejected)
+            columns = {name: pc.filter(column, accepted) for name, column in columns.items()}
 
         return ParseSummary(
-            total_rows=total_rows,
-            valid_rows=valid_rows,
-            failed_rows=total_rows - len(valid_rows),
+            total_rows=batch.num_rows,
+            valid_rows=[],
+            failed_rows=failed_rows,
+            valid_batch=pa.RecordBatch.from_arrays(list(columns.values()), names=list(columns)),
         )
 
-    async def _bulk_insert_orders(self, import_id: int, rows: list[ParsedOrderRow]) -> None:
+    @staticmethod
+    def _validate_batch_rows(batch: pa.RecordBatch, first_row: int, duplicates: pa.Array) -> ParseSummary:
+        chunk = ParseSummary(total_rows=batch.num_rows, valid_rows=[], failed_rows=[])
+
+        for line_number, (raw_row, duplicate) in enumerate(
+            zip(batch.to_pylist(), duplicates.to_pylist()),
+            start=first_row + 1,
+        ):
+            parsed = ImportService._parse_row(raw_row)
+            if isinstance(parsed, ParsedOrderRow):
+                try:
+                    ImportService._validate_row(parsed)
+                    if duplicate:
+                        raise ValueError(f'duplicate id {parsed.source_order_id}')
+                except ValueError as exc:
+                    parsed = exc
+
+            if isinstance(parsed, ParsedOrderRow):
+                chunk.valid_rows.append(parsed)
+            else:
+                chunk.failed_rows.append(FailedOrderRow(
+                    line_number=line_number,
+                    reason=f'{type(parsed).__name__}: {parsed}',
+                ))
+
+        return chunk
+
+    @staticmethod
+    def _outside(array: pa.Array, low: float, high: float) -> pa.Array:
+        # NaN compares false on both sides, so it is out of range like in _validate_row
+        inside = pc.and_(pc.greater_equal(array, low), pc.less_equal(array, high))
+        return pc.fill_null(pc.invert(inside), False)
+
+    @staticmethod
+    def _stop_at_unreadable(
+        rows: Iterator[tuple[int, ParsedOrderRow | Exception]],
+    ) -> Iterator[tuple[int, ParsedOrderRow | Exception]]:
+        # corruption found mid-file (e.g. a damaged Parquet page) ends the import at that row:
+        # the rows before it are kept and the rest is reported as one import error
+        line_number = 0
+        try:
+            for line_number, parsed in rows:
+                yield line_number, parsed
+        except UNREADABLE_FILE_ERRORS as exc:
+            yield line_number + 1, ValueError(f'file is unreadable from this row on ({type(exc).__name__}: {exc})')
+
+    @staticmethod
+    def _read_rows(
+        file_name: str,
+        file_bytes: bytes,
+    ) -> Iterator[tuple[int, ParsedOrderRow | Exception]] | OrderBatches:
+        if file_bytes.startswith(GZIP_MAGIC):
+            return ImportService._read_rows(file_name, ImportService._decompress(file_bytes, 'gzip'))
+
+        if file_bytes.startswith(ZSTD_MAGIC):
+            return ImportService._read_rows(file_name, ImportService._decompress(file_bytes, 'zstd'))
+
+        if file_bytes.startswith(PARQUET_MAGIC):
+            parquet_file = pq.ParquetFile(pa.BufferReader(file_bytes))
+            ids = parquet_file.read(columns=['id']).column('id') if 'id' in parquet_file.schema_arrow.names else None
+            return OrderBatches(
+                batches=parquet_file.iter_batches(batch_size=CHUNK_SIZE),
+                duplicates=ImportService._duplicate_mask(ids, parquet_file.metadata.num_rows),
+            )
+
+        if file_bytes.startswith(ARROW_FILE_MAGIC):
+            return ImportService._read_table(pa.ipc.open_file(pa.BufferReader(file_bytes)).read_all())
+
+        if file_bytes.startswith(ARROW_STREAM_MAGIC):
+            return ImportService._read_table(pa.ipc.open_stream(pa.BufferReader(file_bytes)).read_all())
+
+        if '.ndjson' in file_name or '.jsonl' in file_name or file_bytes.lstrip().startswith(b'{'):
+            try:
+                table = pa_json.read_json(pa.BufferReader(file_bytes))
+            except pa.ArrowInvalid:
+                # a malformed line or a type change between lines fails the whole columnar read
+                return ImportService._read_json_lines(file_bytes)
+            return ImportService._read_table(table)
+
+        return ImportService._read_csv(file_bytes.decode('utf-8'))
+
+    @staticmethod
+    def _read_table(table: pa.Table) -> OrderBatches:
+        ids = table.column('id') if 'id' in table.column_names else None
+        return OrderBatches(
+            batches=ImportService._table_batches(table),
+            duplicates=ImportService._duplicate_mask(ids, table.num_rows),
+        )
+
+    @staticmethod
+    def _table_batches(table: pa.Table) -> Iterator[pa.RecordBatch]:
+        # IPC and JSON tables come in arbitrary chunks; re-slice them into one batch per import chunk
+        for offset in range(0, table.num_rows, CHUNK_SIZE):
+            yield from table.slice(offset, CHUNK_SIZE).combine_chunks().to_batches()
+
+    @staticmethod
+    def _duplicate_mask(ids: pa.ChunkedArray | None, num_rows: int) -> pa.Array:
+        # true for every row whose id already appeared earlier in the file: a stable sort puts equal ids
+        # next to each other in file order, so all but the first of each run are duplicates
+        if ids is None or num_rows < 2:
+            return pa.repeat(pa.scalar(False), num_rows)
+
+        order = pc.sort_indices(ids)
+        sorted_ids = pc.take(ids, order)
+        repeated = pc.fill_null(pc.equal(sorted_ids.slice(1), sorted_ids.slice(0, num_rows - 1)), False)
+        repeated = pa.concat_arrays([pa.array([False]), pa.chunked_array(repeated).combine_chunks()])
+        return pc.take(repeated, pc.sort_indices(order))
+
+    @staticmethod
+    def _decompress(file_bytes: bytes, compression: str) -> bytes:
+        stream = pa.input_stream(pa.BufferReader(file_bytes), compression=compression)
+        return stream.read()
+
+    @staticmethod
+    def _read_csv(decoded: str) -> Iterator[tuple[int, ParsedOrderRow | Exception]]:
+        reader = csv.DictReader(io.StringIO(decoded))
+
+        for raw_row in reader:
+            yield reader.line_num, ImportService._parse_row(raw_row)
+
+    @staticmethod
+    def _read_json_lines(file_bytes: bytes) -> Iterator[tuple[int, ParsedOrderRow | Exception]]:
+        for line_number, line in enumerate(file_bytes.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                raw_row = json.loads(line)
+            except ValueError as exc:
+                yield line_number, exc
+                continue
+            yield line_number, ImportService._parse_row(raw_row)
+
+    @staticmethod
+    def _cast_column(name: str, array: pa.Array) -> pa.Array:
+        array = pc.cast(array, ORDER_COLUMNS[name])
+        if name == 'subtotal':
+            # decimal(12,2) -> exact integer cents, without going through Python Decimals
+            array = pc.cast(pc.multiply(array, CENTS_SCALAR), pa.int64())
+        return array
+
+    @staticmethod
+    def _batch_column(batch: pa.RecordBatch, name: str) -> pa.Array:
+        index = batch.schema.get_field_index(name)
+        if index == -1:
+            raise KeyError(name)
+        return batch.column(index)
+
+    @staticmethod
+    def _parse_row(raw_row: dict) -> ParsedOrderRow | Exception:
+        try:
+            timestamp = raw_row['timestamp']
+            if not isinstance(timestamp, datetime):
+                timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+
+            return ParsedOrderRow(
+                source_order_id=int(raw_row['id']),
+                latitude=float(raw_row['latitude']),
+                longitude=float(raw_row['longitude']),
+                subtotal_cents=to_cents(raw_row['subtotal']),
+                ordered_dt=timestamp,
+            )
+        except Exception as exc:
+            return exc
+
+    @staticmethod
+    def _validate_row(row: ParsedOrderRow) -> None:
+        if not -90 <= row.latitude <= 90:
+            raise ValueError('latitude out of range')
+        if not -180 <= row.longitude <= 180:
+            raise ValueError('longitude out of range')
+        if row.subtotal_cents < 0:
+            raise ValueError('subtotal must be non-negative')
+        if row.subtotal_cents > MAX_SUBTOTAL_CENTS:
+            raise ValueError(SUBTOTAL_TOO_LARGE)
+
+    async def _reserve_order_ids(self, count: int) -> list[int]:
+        # ids are reserved up front so the chunk's orders can be addressed without scanning the import
+        result = await self._db.execute(
+            text('''
+                SELECT nextval(pg_get_serial_sequence('orders', 'id'))
+                FROM generate_series(1, :count)
+            '''),
+            {'count': count},
+        )
+        return list(result.scalars().all())
+
+    async def _bulk_insert_orders(self, import_id: int, rows: list[ParsedOrderRow]) -> list[int]:
+        order_ids = await self._reserve_order_ids(len(rows))
+
         records = [
             (
+                order_id,
                 'import',
                 import_id,
                 row.source_order_id,
                 row.latitude,
                 row.longitude,
-                row.subtotal,
+                row.subtotal_cents,
                 row.ordered_dt,
             )
-            for row in rows
+            for order_id, row in zip(order_ids, rows)
         ]
 
         conn = await self._db.connection()
@@ -171,16 +618,46 @@ class ImportService:
         await pg_conn.copy_records_to_table(
             'orders',
             records=records,
-            columns=[
-                'source',
-                'import_id',
-                'source_order_id',
-                'latitude',
-                'longitude',
-                'subtotal',
-                'ordered_dt',
+            columns=ORDER_COPY_COLUMNS,
+        )
+        return order_ids
+
+    async def _copy_order_batch(self, import_id: int, batch: pa.RecordBatch) -> list[int]:
+        order_ids = await self._reserve_order_ids(batch.num_rows)
+
+        # the accepted Arrow columns go to COPY as CSV, written by pyarrow without per-row Python objects
+        rows = pa.RecordBatch.from_arrays(
+            [
+                pa.array(order_ids, pa.int64()),
+                pa.repeat(pa.scalar('import'), batch.num_rows),
+                pa.repeat(pa.scalar(import_id, pa.int64()), batch.num_rows),
+                batch.column('id'),
+                batch.column('latitude'),
+                batch.column('longitude'),
+                batch.column('subtotal'),
+                batch.column('timestamp'),
             ],
+            names=ORDER_COPY_COLUMNS,
         )
+        csv_buffer = await asyncio.to_thread(self._write_csv, rows)
+
+        conn = await self._db.connection()
+        raw_conn = await conn.get_raw_connection()
+        pg_conn = raw_conn.driver_connection
+
+        await pg_conn.copy_to_table(
+            'orders',
+            source=pa.BufferReader(csv_buffer),
+            columns=ORDER_COPY_COLUMNS,
+            format='csv',
+        )
+        return order_ids
+
+    @staticmethod
+    def _write_csv(rows: pa.RecordBatch) -> pa.Buffer:
+        sink = pa.BufferOutputStream()
+        pa_csv.write_csv(rows, sink, write_options=pa_csv.WriteOptions(include_header=False))
+        return sink.getvalue()
 
     async def _fetch_inserted_orders(self, import_id: int):
         result = await self._db.execute(
@@ -188,7 +665,7 @@ class ImportService:
                  SELECT id,
                         latitude,
                         longitude,
-                        subtotal
+                        subtotal_cents
                  FROM orders
                  WHERE import_id = :import_id
                  ORDER BY id
@@ -211,21 +688,50 @@ class ImportService:
             columns=[
                 'order_id',
                 'status',
-                'composite_tax_rate',
-                'tax_amount',
-                'total_amount',
-                'state_rate',
-                'county_rate',
-                'city_rate',
+                'composite_rate_micros',
+                'tax_amount_cents',
+                'total_amount_cents',
+                'state_rate_micros',
+                'county_rate_micros',
+                'city_rate_micros',
                 'special_rates',
                 'jurisdictions',
                 'error_text'
             ],
         )
 
+    async def _bulk_insert_import_errors(
+        self,
+        import_id: int,
+        rows: list[FailedOrderRow],
+    ) -> None:
+        records = [
+            (
+                import_id,
+                row.line_number,
+                row.reason,
+            )
+            for row in rows
+        ]
+
+        conn = await self._db.connection()
+        raw_conn = await conn.get_raw_connection()
+        pg_conn = raw_conn.driver_connection
+
+        await pg_conn.copy_records_to_table(
+            'import_errors',
+            records=records,
+            columns=[
+                'import_id',
+                'line_number',
+                'reason',
+            ],
+        )
+
     async def _update_import_stats(
         self,
         import_id: int,
+        checkpoint_row: int,
         total_rows: int,
         inserted_rows: int,
         failed_rows: int,
@@ -233,15 +739,47 @@ class ImportService:
         await self._db.execute(
             text('''
                 UPDATE imports
-                SET total_rows = :total_rows,
-                    inserted_rows = :inserted_rows,
-                    failed_rows = :failed_rows
+                SET checkpoint_row = :checkpoint_row,
+                    total_rows = total_rows + :total_rows,
+                    inserted_rows = inserted_rows + :inserted_rows,
+                    failed_rows = failed_rows + :failed_rows
                 WHERE id = :import_id
             '''),
             {
                 'import_id': import_id,
+                'checkpoint_row': checkpoint_row,
                 'total_rows': total_rows,
                 'inserted_rows': inserted_rows,
                 'failed_rows': failed_rows,
             },
         )
+
+    async def _complete_import(self, import_id: int) -> None:
+        await self._db.execute(
+            text('''
+                UPDATE imports
+                SET status = 'completed'
+                WHERE id = :import_id
+            '''),
+            {'import_id': import_id},
+        )
+        await self._db.commit()
+
+    async def _fetch_import_stats(self, import_id: int) -> dict:
+        result = await self._db.execute(
+            text('''
+                SELECT
+                    i.total_rows,
+                    i.inserted_rows,
+                    i.failed_rows,
+                    COUNT(t.id) FILTER (WHERE t.status = 'calculated') AS taxes_calculated,
+                    COUNT(t.id) FILTER (WHERE t.status = 'failed') AS taxes_failed
+                FROM imports i
+                LEFT JOIN orders o ON o.import_id = i.id
+                LEFT JOIN order_taxes t ON t.order_id = o.id
+                WHERE i.id = :import_id
+                GROUP BY i.id
+            '''),
+            {'import_id': import_id},
+        )
+        return result.mappings().one()
@@ -1,6 +1,55 @@
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.config import Config
+
+# the point is matched against state bounding boxes first; geo_boundaries is partitioned by state,
+# so only the partitions of the candidate states (usually one) are probed
+STATE_MATCH_SQL = '''
+    SELECT
+        se.state,
+        MAX(gb.name) FILTER (WHERE gb.type = 'county') AS county_name,
+        MAX(gb.name) FILTER (WHERE gb.type = 'city') AS city_name
+    FROM state_extents se
+    JOIN geo_boundaries gb ON gb.state = se.state
+        AND gb.type IN ('county', 'city')
+        AND ST_Covers(gb.geom, {point})
+    WHERE ST_Covers(se.extent, {point})
+    GROUP BY se.state
+    -- neighbouring boxes overlap; prefer the state whose county covers the point
+    ORDER BY MAX(gb.name) FILTER (WHERE gb.type = 'county') IS NULL, se.state
+    LIMIT 1
+'''
+
+# nearest county (and city) within :tolerance metres, one KNN (<->) probe per candidate state on that state's GiST index
+STATE_SNAP_SQL = '''
+    SELECT
+        se.state,
+        county.name AS county_name,
+        city.name AS city_name
+    FROM state_extents se
+    CROSS JOIN LATERAL (
+        SELECT gb.name, gb.geom
+        FROM geo_boundaries gb
+        WHERE gb.state = se.state
+            AND gb.type = 'county'
+        ORDER BY gb.geom <-> {point}
+        LIMIT 1
+    ) county
+    LEFT JOIN LATERAL (
+        SELECT gb.name, gb.geom
+        FROM geo_boundaries gb
+        WHERE gb.state = se.state
+            AND gb.type = 'city'
+        ORDER BY gb.geom <-> {point}
+        LIMIT 1
+    ) city ON ST_DWithin(city.geom::geography, {point}::geography, :tolerance)
+    WHERE ST_DWithin(se.extent::geography, {point}::geography, :tolerance)
+        AND ST_DWithin(county.geom::geography, {point}::geography, :tolerance)
+    ORDER BY county.geom <-> {point}
+    LIMIT 1
+'''
+
 
 class JurisdictionService:
 
@@ -9,49 +58,117 @@ class JurisdictionService:
         db: AsyncSession,
         latitude: float,
         longitude: float,
-    ) -> tuple[str | None, str | None] | None:
-        query = text('''
-            SELECT 
-                MAX(name) FILTER (WHERE type = 'county') AS county_name,
-                MAX(name) FILTER (WHERE type = 'city') AS city_name
-            FROM geo_boundaries
-            WHERE 
-                type IN ('county', 'city')
-                AND ST_Covers(
-                    geom,
-                    ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)
-                )
+    ) -> tuple[str | None, str | None, str | None, bool] | None:
+        state, county, city, snapped = (await JurisdictionService.resolve_many(db, [(latitude, longitude)]))[0]
+        if county is None and city is None:
+            return None
+
+        return state, county, city, snapped
+
+    @staticmethod
+    async def resolve_for_import(
+        db: AsyncSession,
+        order_ids: list[int],
+    ):
+        query = text(f'''
+            SELECT
+                o.id,
+                o.latitude,
+                o.longitude,
+                o.subtotal_cents,
+                m.state,
+                m.county_name,
+                m.city_name
+            FROM orders o
+            LEFT JOIN LATERAL ({STATE_MATCH_SQL.format(point='o.geom')}) m ON true
+            WHERE o.id = ANY(CAST(:order_ids AS bigint[]))
+        ''')
+
+        result = await db.execute(query, {'order_ids': order_ids})
+        rows = [{**row, 'snapped': False} for row in result.mappings().all()]
+
+        await JurisdictionService._snap_unmatched(db, rows)
+        return rows
+
+    @staticmethod
+    async def resolve_many(
+        db: AsyncSession,
+        points: list[tuple[float, float]],
+    ) -> list[tuple[str | None, str | None, str | None, bool]]:
+        query = text(f'''
+            SELECT
+                p.idx,
+                p.lat AS latitude,
+                p.lon AS longitude,
+                m.state,
+                m.county_name,
+                m.city_name
+            FROM unnest(CAST(:lats AS float8[]), CAST(:lons AS float8[])) WITH ORDINALITY AS p(lat, lon, idx)
+            CROSS JOIN LATERAL (
+                SELECT ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326) AS geom
+            ) pt
+            LEFT JOIN LATERAL ({STATE_MATCH_SQL.format(point='pt.geom')}) m ON true
+            ORDER BY p.idx
         ''')
 
         result = await db.execute(
             query,
-            {'lat': latitude, 'lon': longitude},
+            {
+                'lats': [lat for lat, _ in points],
+                'lons': [lon for _, lon in points],
+            },
         )
+        rows = [{**row, 'snapped': False} for row in result.mappings().all()]
+
+        await JurisdictionService._snap_unmatched(db, rows)
+        return [(row['state'], row['county_name'], row['city_name'], row['snapped']) for row in rows]
 
-        row = result.fetchone()
-        if row and (row.county_name or row.city_name):
-            return row.county_name, row.city_name
+    @staticmethod
+    async def _snap_unmatched(db: AsyncSession, rows: list[dict]) -> None:
+        unmatched = [row for row in rows if row['county_name'] is None]
+        if not unmatched:
+            return
+
+        snapped = await JurisdictionService._snap_to_nearest(
+            db,
+            [(row['latitude'], row['longitude']) for row in unmatched],
+        )
 
-        return None
+        for row, (state, county_name, city_name) in zip(unmatched, snapped):
+            if county_name is not None:
+                row['state'] = state
+                row['county_name'] = county_name
+                row['city_name'] = city_name
+                row['snapped'] = True
 
     @staticmethod
-    async def resolve_for_import(
+    async def _snap_to_nearest(
         db: AsyncSession,
-        import_id: int,
-    ):
-        query = text('''
+        points: list[tuple[float, float]],
+    ) -> list[tuple[str | None, str | None, str | None]]:
+        if Config.BOUNDARY_SNAP_TOLERANCE_M <= 0:
+            return []
+
+        query = text(f'''
             SELECT
-                o.id,
-                o.subtotal,
-                MAX(gb.name) FILTER (WHERE gb.type = 'county') AS county_name,
-                MAX(gb.name) FILTER (WHERE gb.type = 'city') AS city_name
-            FROM orders o
-            LEFT JOIN geo_boundaries gb ON gb.type IN ('county', 'city')
-                AND ST_Covers(gb.geom, ST_SetSRID(ST_MakePoint(o.longitude, o.latitude), 4326))
-            WHERE o.import_id = :import_id
-            GROUP BY o.id, o.subtotal
-            ORDER BY o.id
+                p.idx,
+                m.state,
+                m.county_name,
+                m.city_name
+            FROM unnest(CAST(:lats AS float8[]), CAST(:lons AS float8[])) WITH ORDINALITY AS p(lat, lon, idx)
+            CROSS JOIN LATERAL (
+                SELECT ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326) AS geom
+            ) pt
+            LEFT JOIN LATERAL ({STATE_SNAP_SQL.format(point='pt.geom')}) m ON true
+            ORDER BY p.idx
         ''')
 
-        result = await db.execute(query, {'import_id': import_id})
-        return result.mappings().all()
+        result = await db.execute(
+            query,
+            {
+                'lats': [lat for lat, _ in points],
+                'lons': [lon for _, lon in points],
+                'tolerance': Config.BOUNDARY_SNAP_TOLERANCE_M,
+            },
+        )
+        return [(row.state, row.county_name, row.city_name) for row in result]
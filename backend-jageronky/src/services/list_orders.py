@@ -1,6 +1,29 @@
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.money import cents_to_float, micros_to_float
+
+
+def order_out_from_row(row) -> dict:
+    # storage keeps cents / micro-units; the API speaks decimal dollars and rates
+    return {
+        'id': row['id'],
+        'latitude': row['latitude'],
+        'longitude': row['longitude'],
+        'subtotal': cents_to_float(row['subtotal_cents']),
+        'timestamp': row['timestamp'],
+        'composite_tax_rate': micros_to_float(row['composite_rate_micros']),
+        'tax_amount': cents_to_float(row['tax_amount_cents']),
+        'total_amount': cents_to_float(row['total_amount_cents']),
+        'breakdown': {
+            'state_rate': micros_to_float(row['state_rate_micros']),
+            'county_rate': micros_to_float(row['county_rate_micros']),
+            'city_rate': micros_to_float(row['city_rate_micros']),
+            'special_rates': [micros_to_float(rate) for rate in row['special_rates'] or []],
+        },
+        'jurisdictions': row['jurisdictions'],
+    }
+
 
 class ListOrdersService:
 
@@ -38,14 +61,14 @@ class ListOrdersService:
                     o.id,
                     o.latitude,
                     o.longitude,
-                    o.subtotal,
+                    o.subtotal_cents,
                     o.ordered_dt AS timestamp,
-                    t.composite_tax_rate,
-                    t.tax_amount,
-                    t.total_amount,
-                    t.state_rate,
-                    t.county_rate,
-                    t.city_rate,
+                    t.composite_rate_micros,
+                    t.tax_amount_cents,
+                    t.total_amount_cents,
+                    t.state_rate_micros,
+                    t.county_rate_micros,
+                    t.city_rate_micros,
                     t.special_rates,
                     t.jurisdictions
                 FROM orders o
@@ -60,26 +83,91 @@ class ListOrdersService:
             },
         )
 
+        return [order_out_from_row(row) for row in result.mappings().all()]
+
+    async def list_changes(
+        self,
+        since: str,
+        limit: int,
+    ) -> tuple[list[dict], str]:
+        since_key = self._parse_cursor(since)
+
+        # every transaction below xmin has finished, so rows under it can no longer appear behind the cursor
+        xmin_result = await self._db.execute(
+            text('''SELECT pg_snapshot_xmin(pg_current_snapshot())::text''')
+        )
+        xmin = int(xmin_result.scalar_one())
+
+        result = await self._db.execute(
+            text('''
+                SELECT
+                    o.id,
+                    o.latitude,
+                    o.longitude,
+                    o.subtotal_cents,
+                    o.ordered_dt AS timestamp,
+                    t.composite_rate_micros,
+                    t.tax_amount_cents,
+                    t.total_amount_cents,
+                    t.state_rate_micros,
+                    t.county_rate_micros,
+                    t.city_rate_micros,
+                    t.special_rates,
+                    t.jurisdictions,
+                    t.change_xid::text AS change_xid
+                FROM order_taxes t
+                JOIN orders o ON o.id = t.order_id
+                WHERE t.status = 'calculated'
+                    AND (t.change_xid, t.order_id) > (CAST(:since_xid AS xid8), :since_order_id)
+                    AND t.change_xid < CAST(:xmin AS xid8)
+                ORDER BY t.change_xid, t.order_id
+                LIMIT :limit
+            '''),
+            {
+                'since_xid': str(since_key[0]),
+                'since_order_id': since_key[1],
+                'xmin': str(xmin),
+                'limit': limit,
+            },
+        )
+
         rows = result.mappings().all()
 
-        items = []
-        for row in rows:
-            items.append({
-                'id': row['id'],
-                'latitude': float(row['latitude']),
-                'longitude': float(row['longitude']),
-                'subtotal': float(row['subtotal']),
-                'timestamp': row['timestamp'],
-                'composite_tax_rate': float(row['composite_tax_rate']),
-                'tax_amount': float(row['tax_amount']),
-                'total_amount': float(row['total_amount']),
-                'breakdown': {
-                    'state_rate': float(row['state_rate']),
-                    'county_rate': float(row['county_rate']),
-                    'city_rate': float(row['city_rate']),
-                    'special_rates': row['special_rates'] or [],
-                },
-                'jurisdictions': row['jurisdictions'],
-            })
-
-        return items
+        if len(rows) == limit:
+            next_key = (int(rows[-1]['change_xid']), rows[-1]['id'])
+        else:
+            next_key = max((xmin, 0), since_key)
+
+        items = [order_out_from_row(row) for row in rows]
+        return items, f'{next_key[0]}.{next_key[1]}'
+
+    async def has_changes_after(self, cursor: str) -> bool:
+        # committed rows past the cursor that list_changes still withholds (xmin not advanced yet)
+        since_key = self._parse_cursor(cursor)
+
+        result = await self._db.execute(
+            text('''
+                SELECT EXISTS (
+                    SELECT 1
+                    FROM order_taxes t
+                    WHERE t.status = 'calculated'
+                        AND (t.change_xid, t.order_id) > (CAST(:since_xid AS xid8), :since_order_id)
+                )
+            '''),
+            {
+                'since_xid': str(since_key[0]),
+                'since_order_id': since_key[1],
+            },
+        )
+        return result.scalar_one()
+
+    async def current_cursor(self) -> str:
+        result = await self._db.execute(
+            text('''SELECT pg_snapshot_xmin(pg_current_snapshot())::text''')
+        )
+        return f'{result.scalar_one()}.0'
+
+    @staticmethod
+    def _parse_cursor(cursor: str) -> tuple[int, int]:
+        xid, order_id = cursor.split('.')
+        return int(xid), int(order_id)
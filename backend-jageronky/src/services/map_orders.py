@@ -0,0 +1,125 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.money import cents_to_float
+
+# leaflet renders 256px tiles; orders closer than CLUSTER_CELL_PX on screen share a cell
+TILE_SIZE_PX = 256
+CLUSTER_CELL_PX = 32
+
+# vector tiles
+MVT_EXTENT = 4096
+MVT_BUFFER = 64
+WEB_MERCATOR_WIDTH = 40075016.685578488
+
+MAX_CLUSTERS = 5000
+
+
+class MapOrdersService:
+
+    def __init__(self, db: AsyncSession):
+        self._db = db
+
+    async def get_clusters(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        zoom: int,
+    ) -> tuple[list[dict], float]:
+        cell_size = self.grid_cell_degrees(zoom)
+
+        result = await self._db.execute(
+            text('''
+                SELECT
+                    COUNT(*) AS count,
+                    AVG(o.latitude) AS latitude,
+                    AVG(o.longitude) AS longitude,
+                    MIN(o.id) AS order_id,
+                    SUM(t.total_amount_cents) AS total_amount_cents
+                FROM orders o
+                JOIN order_taxes t ON t.order_id = o.id
+                    AND t.status = 'calculated'
+                WHERE o.geom && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)
+                GROUP BY ST_SnapToGrid(o.geom, :cell_size)
+                ORDER BY count DESC
+                LIMIT :limit
+            '''),
+            {
+                'min_lat': min(min_lat, max_lat),
+                'max_lat': max(min_lat, max_lat),
+                'min_lon': min(min_lon, max_lon),
+                'max_lon': max(min_lon, max_lon),
+                'cell_size': cell_size,
+                'limit': MAX_CLUSTERS,
+            },
+        )
+
+        items = []
+        for row in result.mappings().all():
+            items.append({
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+                'count': row['count'],
+                'order_id': row['order_id'] if row['count'] == 1 else None,
+                'total_amount': cents_to_float(row['total_amount_cents']),
+            })
+
+        return items, cell_size
+
+    async def get_tile(self, z: int, x: int, y: int) -> bytes:
+        result = await self._db.execute(
+            text('''
+                WITH bounds AS (
+                    SELECT ST_TileEnvelope(:z, :x, :y) AS geom
+                ),
+                points AS (
+                    SELECT
+                        o.id,
+                        t.total_amount_cents,
+                        ST_Transform(o.geom, 3857) AS geom
+                    FROM orders o
+                    JOIN order_taxes t ON t.order_id = o.id
+                        AND t.status = 'calculated'
+                    CROSS JOIN bounds b
+                    WHERE o.geom && ST_Transform(b.geom, 4326)
+                ),
+                cells AS (
+                    SELECT
+                        COUNT(*) AS count,
+                        MIN(id) AS order_id,
+                        SUM(total_amount_cents) AS total_amount_cents,
+                        ST_Centroid(ST_Collect(geom)) AS geom
+                    FROM points
+                    GROUP BY ST_SnapToGrid(geom, :cell_size)
+                )
+                SELECT ST_AsMVT(mvt, 'orders', :extent, 'geom')
+                FROM (
+                    SELECT
+                        c.count,
+                        CASE WHEN c.count = 1 THEN c.order_id END AS order_id,
+                        (c.total_amount_cents / 100.0)::float8 AS total_amount,
+                        ST_AsMVTGeom(c.geom, b.geom, :extent, :buffer, true) AS geom
+                    FROM cells c
+                    CROSS JOIN bounds b
+                ) mvt
+            '''),
+            {
+                'z': z,
+                'x': x,
+                'y': y,
+                'cell_size': self.tile_cell_meters(z),
+                'extent': MVT_EXTENT,
+                'buffer': MVT_BUFFER,
+            },
+        )
+        return bytes(result.scalar_one() or b'')
+
+    @staticmethod
+    def grid_cell_degrees(zoom: int) -> float:
+        return 360.0 / (TILE_SIZE_PX * (1 << zoom)) * CLUSTER_CELL_PX
+
+    @staticmethod
+    def tile_cell_meters(zoom: int) -> float:
+        return WEB_MERCATOR_WIDTH / (TILE_SIZE_PX * (1 << zoom)) * CLUSTER_CELL_PX
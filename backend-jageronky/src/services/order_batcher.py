@@ -0,0 +1,255 @@
+import asyncio
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.tax_config import TaxConfig
+from src.db.session import AsyncSessionLocal
+from src.schemas.orders import OrderCreate
+from src.services.jurisdiction import JurisdictionService
+from src.services.list_orders import order_out_from_row
+from src.services.tax_calculation import TaxCalculationService
+
+PendingOrder = tuple[OrderCreate, asyncio.Future]
+
+
+# group commit for POST /orders: callers are answered only after the shared transaction commits
+class OrderWriteBatcher:
+
+    def __init__(self, tax_config: TaxConfig, window_ms: float, max_size: int, queue_timeout_s: float):
+        self._tax_service = TaxCalculationService(tax_config)
+        self._window = window_ms / 1000
+        self._max_size = max_size
+        self._queue_timeout = queue_timeout_s
+        self._queue: asyncio.Queue[PendingOrder | None] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._in_flight: set[asyncio.Future] = set()
+        self._closed = False
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._closed = True
+        if self._task is None:
+            return
+
+        # the sentinel is queued behind pending orders, so they are still flushed
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, dto: OrderCreate) -> dict:
+        if self._closed:
+            raise self._unavailable('server is shutting down')
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((dto, future))
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self._queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        # a write already in progress is waited for, so the caller never misses a committed order
+        if future in self._in_flight:
+            return await future
+
+        future.cancel()
+        raise self._unavailable('order writer is not keeping up')
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            stopping = False
+            deadline = loop.time() + self._window
+
+            while len(batch) < self._max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+            if stopping:
+                return
+
+    async def _flush(self, batch: list[PendingOrder]) -> None:
+        # callers that timed out while queued were already answered
+        batch = [(dto, future) for dto, future in batch if not future.done()]
+        if not batch:
+            return
+
+        futures = {future for _, future in batch}
+        self._in_flight |= futures
+        try:
+            await self._flush_pending(batch)
+        finally:
+            self._in_flight -= futures
+
+    async def _flush_pending(self, batch: list[PendingOrder]) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                results = await self._write_batch(db, [dto for dto, _ in batch])
+                await db.commit()
+        except Exception as exc:
+            if len(batch) > 1:
+                # one bad order must not fail the others: write them one by one
+                for item in batch:
+                    await self._flush_pending([item])
+                return
+
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(exc)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _write_batch(self, db: AsyncSession, dtos: list[OrderCreate]) -> list[dict | Exception]:
+        resolved = await JurisdictionService.resolve_many(
+            db=db,
+            points=[(dto.latitude, dto.longitude) for dto in dtos],
+        )
+        order_ids = await self._reserve_order_ids(db, len(dtos))
+
+        results: list[dict | Exception] = []
+        order_records = []
+        tax_records = []
+
+        for dto, order_id, (state, county, city, snapped) in zip(dtos, order_ids, resolved):
+            subtotal_cents = dto.subtotal_cents
+            tax_record = self._tax_service.build_order_tax_record(
+                order_id=order_id,
+                subtotal_cents=subtotal_cents,
+                state=state,
+                county=county,
+                city=city,
+                snapped=snapped,
+            )
+
+            # failed calculations are not persisted, same as the per-request path
+            if tax_record[1] != 'calculated':
+                results.append(HTTPException(
+                    status_code=422,
+                    detail=f'tax calculation failed: {tax_record[10]}',
+                ))
+                continue
+
+            order_records.append((
+                order_id,
+                'manual',
+                dto.latitude,
+                dto.longitude,
+                subtotal_cents,
+                dto.timestamp,
+            ))
+            tax_records.append(tax_record)
+            results.append(self._build_order_out(dto, subtotal_cents, tax_record))
+
+        if order_records:
+            await self._copy_records(db, order_records, tax_records)
+
+        return results
+
+    @staticmethod
+    def _unavailable(reason: str) -> HTTPException:
+        return HTTPException(
+            status_code=503,
+            detail=f'Order was not accepted: {reason}, retry later.',
+            headers={'Retry-After': '1'},
+        )
+
+    @staticmethod
+    async def _reserve_order_ids(db: AsyncSession, count: int) -> list[int]:
+        result = await db.execute(
+            text('''
+                SELECT nextval(pg_get_serial_sequence('orders', 'id'))
+                FROM generate_series(1, :count)
+            '''),
+            {'count': count},
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def _copy_records(
+        db: AsyncSession,
+        order_records: list[tuple],
+        tax_records: list[tuple],
+    ) -> None:
+        conn = await db.connection()
+        raw_conn = await conn.get_raw_connection()
+        pg_conn = raw_conn.driver_connection
+
+        await pg_conn.copy_records_to_table(
+            'orders',
+            records=order_records,
+            columns=[
+                'id',
+                'source',
+                'latitude',
+                'longitude',
+                'subtotal_cents',
+                'ordered_dt',
+            ],
+        )
+
+        await pg_conn.copy_records_to_table(
+            'order_taxes',
+            records=tax_records,
+            columns=[
+                'order_id',
+                'status',
+                'composite_rate_micros',
+                'tax_amount_cents',
+                'total_amount_cents',
+                'state_rate_micros',
+                'county_rate_micros',
+                'city_rate_micros',
+                'special_rates',
+                'jurisdictions',
+                'error_text'
+            ],
+        )
+
+    @staticmethod
+    def _build_order_out(dto: OrderCreate, subtotal_cents: int, tax_record: tuple) -> dict:
+        return order_out_from_row({
+            'id': tax_record[0],
+            'latitude': dto.latitude,
+            'longitude': dto.longitude,
+            'subtotal_cents': subtotal_cents,
+            'timestamp': dto.timestamp,
+            'composite_rate_micros': tax_record[2],
+            'tax_amount_cents': tax_record[3],
+            'total_amount_cents': tax_record[4],
+            'state_rate_micros': tax_record[5],
+            'county_rate_micros': tax_record[6],
+            'city_rate_micros': tax_record[7],
+            'special_rates': json.loads(tax_record[8]),
+            'jurisdictions': json.loads(tax_record[9]),
+        })
@@ -1,6 +1,6 @@
 import json
-from decimal import Decimal, ROUND_HALF_UP
 
+from src.core.money import apply_rate
 from src.core.tax_config import TaxConfig
 
 
@@ -12,67 +12,81 @@ class TaxCalculationService:
     def build_order_tax_record(
         self,
         order_id: int,
-        subtotal: Decimal,
+        subtotal_cents: int,
+        state: str | None,
         county: str | None,
         city: str | None,
+        snapped: bool = False,
     ) -> tuple:
-        if county is None:
+        if state is None or county is None:
             return self._build_failed_record(
                 order_id=order_id,
+                state=state,
                 county=None,
                 city=city,
-                error_text='point is outside NY jurisdiction boundaries',
+                error_text='point is outside supported jurisdiction boundaries',
             )
 
-        county_data = self._tax_config.get_county(county)
-        if county_data is None:
+        state_config = self._tax_config.get_state(state)
+        if state_config is None:
             return self._build_failed_record(
                 order_id=order_id,
+                state=state,
                 county=county,
                 city=city,
-                error_text=f'{county} not found in tax config',
+                error_text=f'{state} not found in tax config',
             )
 
-        state_rate = Decimal(str(self._tax_config.state_rate))
-        county_rate = Decimal('0')
-        city_rate = Decimal('0')
-        special_rates: list[float] = []
+        county_rate = state_config.get_county_rate(county)
+        if county_rate is None:
+            return self._build_failed_record(
+                order_id=order_id,
+                state=state,
+                county=county,
+                city=city,
+                error_text=f'{county} ({state}) not found in tax config',
+            )
+
+        # rates in micro-units, amounts in cents
+        state_rate = state_config.state_rate
+        city_rate = 0
+        special_rates: list[int] = []
 
-        city_exception = None
+        city_exception_rate = None
         if city:
-            city_exception = self._tax_config.get_city_exception(city)
+            city_exception_rate = state_config.get_city_rate(city)
 
-        if city_exception:
-            city_rate = Decimal(str(city_exception['city_rate']))
-        else:
-            county_rate = Decimal(str(county_data['county_rate']))
+        if city_exception_rate is not None:
+            city_rate = city_exception_rate
+            county_rate = 0
 
-        if self._tax_config.is_mctd_county(county):
-            mctd_rate = Decimal(str(self._tax_config.mctd_rate))
-            special_rates.append(float(mctd_rate))
+        if state_config.is_mctd_county(county):
+            mctd_rate = state_config.mctd_rate
+            special_rates.append(mctd_rate)
         else:
-            mctd_rate = Decimal('0')
+            mctd_rate = 0
 
         composite_tax_rate = state_rate + county_rate + city_rate + mctd_rate
-        tax_amount = (subtotal * composite_tax_rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        total_amount = (subtotal + tax_amount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        tax_amount = apply_rate(subtotal_cents, composite_tax_rate)
+        total_amount = subtotal_cents + tax_amount
 
         jurisdictions = {
-            'state': 'NY',
+            'state': state,
             'county': county,
             'city': city,
             'special': ['MCTD'] if mctd_rate > 0 else [],
+            'snapped': snapped,
         }
 
         return (
             order_id,
             'calculated',
-            float(composite_tax_rate),
-            float(tax_amount),
-            float(total_amount),
-            float(state_rate),
-            float(county_rate),
-            float(city_rate),
+            composite_tax_rate,
+            tax_amount,
+            total_amount,
+            state_rate,
+            county_rate,
+            city_rate,
             json.dumps(special_rates),
             json.dumps(jurisdictions),
             None,
@@ -81,12 +95,13 @@ class TaxCalculationService:
     @staticmethod
     def _build_failed_record(
         order_id: int,
+        state: str | None,
         county: str | None,
         city: str | None,
         error_text: str,
     ) -> tuple:
         jurisdictions = {
-            'state': None,
+            'state': state,
             'county': county,
             'city': city,
             'special': [],
@@ -0,0 +1,206 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import Config
+from src.core.money import MICROS_PER_UNIT
+from src.core.tax_config import TaxConfig
+from src.services.jurisdiction import STATE_MATCH_SQL, STATE_SNAP_SQL
+
+# serializes rate syncs from concurrently starting workers
+SYNC_LOCK_KEY = 718
+
+
+# set-based alternative to TaxCalculationService for imports: the rates live in Postgres and the
+# taxes of a whole chunk are computed by one INSERT ... SELECT, so order rows never leave the database.
+# The rules (city exceptions, MCTD, half-up rounding) must stay identical to TaxCalculationService.
+class TaxRateTablesService:
+
+    def __init__(self, db: AsyncSession):
+        self._db = db
+
+    async def sync(self, tax_config: TaxConfig) -> None:
+        await self._db.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': SYNC_LOCK_KEY})
+        await self._db.execute(text('DELETE FROM tax_state_rates'))
+
+        state_rows = []
+        county_rows = []
+        city_rows = []
+
+        for state in tax_config.states:
+            state_config = tax_config.get_state(state)
+            state_rows.append({
+                'state': state,
+                'state_rate_micros': state_config.state_rate,
+                'mctd_rate_micros': state_config.mctd_rate,
+            })
+            county_rows.extend(
+                {
+                    'state': state,
+                    'name': name,
+                    'county_rate_micros': rate,
+                    'mctd': state_config.is_mctd_county(name),
+                }
+                for name, rate in state_config.county_rates.items()
+            )
+            city_rows.extend(
+                {'state': state, 'name': name, 'city_rate_micros': rate}
+                for name, rate in state_config.city_rates.items()
+            )
+
+        if state_rows:
+            await self._db.execute(
+                text('''
+                    INSERT INTO tax_state_rates (state, state_rate_micros, mctd_rate_micros)
+                    VALUES (:state, :state_rate_micros, :mctd_rate_micros)
+                '''),
+                state_rows,
+            )
+        if county_rows:
+            await self._db.execute(
+                text('''
+                    INSERT INTO tax_county_rates (state, name, county_rate_micros, mctd)
+                    VALUES (:state, :name, :county_rate_micros, :mctd)
+                '''),
+                county_rows,
+            )
+        if city_rows:
+            await self._db.execute(
+                text('''
+                    INSERT INTO tax_city_rates (state, name, city_rate_micros)
+                    VALUES (:state, :name, :city_rate_micros)
+                '''),
+                city_rows,
+            )
+
+        await self._db.commit()
+
+    async def calculate_for_import(self, order_ids: list[int]) -> None:
+        query = text(f'''
+            WITH pending AS (
+                SELECT
+                    o.id,
+                    o.subtotal_cents,
+                    m.state,
+                    m.county_name,
+                    m.city_name,
+                    s.state AS snapped_state,
+                    s.county_name AS snapped_county_name,
+                    s.city_name AS snapped_city_name
+                FROM orders o
+                LEFT JOIN LATERAL ({STATE_MATCH_SQL.format(point='o.geom')}) m ON true
+                LEFT JOIN LATERAL (
+                    SELECT *
+                    FROM ({STATE_SNAP_SQL.format(point='o.geom')}) nearest
+                    WHERE m.county_name IS NULL
+                        AND CAST(:tolerance AS float8) > 0
+                ) s ON true
+                WHERE o.id = ANY(CAST(:order_ids AS bigint[]))
+            ),
+            resolved AS (
+                SELECT
+                    id,
+                    subtotal_cents,
+                    snapped_county_name IS NOT NULL AS snapped,
+                    CASE WHEN snapped_county_name IS NOT NULL THEN snapped_state ELSE state END AS state,
+                    CASE WHEN snapped_county_name IS NOT NULL THEN snapped_county_name ELSE county_name END AS county,
+                    CASE WHEN snapped_county_name IS NOT NULL THEN snapped_city_name ELSE city_name END AS city
+                FROM pending
+            ),
+            rated AS (
+                SELECT
+                    r.*,
+                    CASE
+                        WHEN r.state IS NULL OR r.county IS NULL
+                            THEN 'point is outside supported jurisdiction boundaries'
+                        WHEN sr.state IS NULL
+                            THEN r.state || ' not found in tax config'
+                        WHEN cr.name IS NULL
+                            THEN r.county || ' (' || r.state || ') not found in tax config'
+                    END AS error_text,
+                    sr.state_rate_micros,
+                    CASE WHEN ci.name IS NULL THEN cr.county_rate_micros ELSE 0 END AS county_rate_micros,
+                    COALESCE(ci.city_rate_micros, 0) AS city_rate_micros,
+                    COALESCE(cr.mctd, false) AS mctd,
+                    CASE WHEN cr.mctd THEN sr.mctd_rate_micros ELSE 0 END AS mctd_rate_micros
+                FROM resolved r
+                LEFT JOIN tax_state_rates sr ON sr.state = r.state
+                LEFT JOIN tax_county_rates cr ON cr.state = r.state AND cr.name = r.county
+                LEFT JOIN tax_city_rates ci ON ci.state = r.state AND ci.name = r.city
+            ),
+            computed AS (
+                SELECT
+                    *,
+                    state_rate_micros + county_rate_micros + city_rate_micros + mctd_rate_micros
+                        AS composite_rate_micros
+                FROM rated
+            ),
+            taxed AS (
+                SELECT
+                    *,
+                    (subtotal_cents * composite_rate_micros + :half_unit) / :unit AS tax_amount_cents
+                FROM computed
+            )
+            INSERT INTO order_taxes (
+                order_id,
+                status,
+                composite_rate_micros,
+                tax_amount_cents,
+                total_amount_cents,
+                state_rate_micros,
+                county_rate_micros,
+                city_rate_micros,
+                special_rates,
+                jurisdictions,
+                error_text
+            )
+            SELECT
+                id,
+                'calculated'::tax_calc_status,
+                composite_rate_micros,
+                tax_amount_cents,
+                subtotal_cents + tax_amount_cents,
+                state_rate_micros,
+                county_rate_micros,
+                city_rate_micros,
+                CASE WHEN mctd THEN jsonb_build_array(mctd_rate_micros) ELSE '[]'::jsonb END,
+                jsonb_build_object(
+                    'state', state,
+                    'county', county,
+                    'city', city,
+                    'special', CASE WHEN mctd_rate_micros > 0 THEN '["MCTD"]'::jsonb ELSE '[]'::jsonb END,
+                    'snapped', snapped
+                ),
+                NULL
+            FROM taxed
+            WHERE error_text IS NULL
+            UNION ALL
+            SELECT
+                id,
+                'failed'::tax_calc_status,
+                NULL,
+                NULL,
+                NULL,
+                NULL,
+                NULL,
+                NULL,
+                '[]'::jsonb,
+                jsonb_build_object(
+                    'state', state,
+                    'county', county,
+                    'city', city,
+                    'special', '[]'::jsonb
+                ),
+                error_text
+            FROM taxed
+            WHERE error_text IS NOT NULL
+        ''')
+
+        await self._db.execute(
+            query,
+            {
+                'order_ids': order_ids,
+                'tolerance': Config.BOUNDARY_SNAP_TOLERANCE_M,
+                'half_unit': MICROS_PER_UNIT // 2,
+                'unit': MICROS_PER_UNIT,
+            },
+        )
@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.session import AsyncSessionLocal, engine
+from src.services.change_feed import ChangeFeed
+
+# Reproduces an import chunk and an interactive POST /orders committing out of order, and checks that
+# the ETag version of GET /orders changes on both commits:
+#   1. "import" reserves an order id and writes its order, but does not commit yet
+#   2. "interactive" writes an order with a higher id and a later now() and commits
+#   3. "import" commits; max(order_id) and max(calculated_dt) stay the same, the version must not
+# Both orders are deleted afterwards.
+#
+#   python -m tools.etag_interleaving
+
+TAX_ERROR = 'etag interleaving probe'
+
+
+async def wait_for_version(feed: ChangeFeed, previous: str | None, timeout_s: float) -> str | None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_s
+    while loop.time() < deadline:
+        if feed.version is not None and feed.version != previous:
+            return feed.version
+        await asyncio.sleep(0.05)
+    return feed.version
+
+
+async def write_order(db: AsyncSession, order_id: int | None) -> int:
+    result = await db.execute(
+        text('''
+            INSERT INTO orders (id, source, latitude, longitude, subtotal_cents, ordered_dt)
+            VALUES (COALESCE(:order_id, nextval(pg_get_serial_sequence('orders', 'id'))), 'manual', 40.7128, -74.0060, 100, now())
+            RETURNING id
+        '''),
+        {'order_id': order_id},
+    )
+    order_id = result.scalar_one()
+
+    await db.execute(
+        text('''
+            INSERT INTO order_taxes (order_id, status, jurisdictions, error_text)
+            VALUES (:order_id, 'failed', '{}'::jsonb, :error)
+        '''),
+        {'order_id': order_id, 'error': TAX_ERROR},
+    )
+    return order_id
+
+
+async def column_maxima(db: AsyncSession) -> tuple:
+    result = await db.execute(text('''SELECT MAX(order_id), MAX(calculated_dt) FROM order_taxes'''))
+    return tuple(result.one())
+
+
+async def main(args: argparse.Namespace) -> int:
+    feed = ChangeFeed()
+    await feed.start()
+    order_ids = []
+
+    try:
+        if await wait_for_version(feed, None, args.timeout) is None:
+            print('change feed did not connect')
+            return 1
+
+        async with AsyncSessionLocal() as import_db, AsyncSessionLocal() as interactive_db:
+            reserved = (await import_db.execute(
+                text('''SELECT nextval(pg_get_serial_sequence('orders', 'id'))''')
+            )).scalar_one()
+            order_ids.append(await write_order(import_db, reserved))
+
+            version_start = feed.version
+            order_ids.append(await write_order(interactive_db, None))
+            await interactive_db.commit()
+
+            version_before = await wait_for_version(feed, version_start, args.timeout)
+            maxima_before = await column_maxima(interactive_db)
+            await interactive_db.commit()
+
+            await import_db.commit()
+
+            version_after = await wait_for_version(feed, version_before, args.timeout)
+            maxima_after = await column_maxima(interactive_db)
+    finally:
+        if order_ids:
+            async with AsyncSessionLocal() as db:
+                await db.execute(text('''DELETE FROM orders WHERE id = ANY(CAST(:ids AS bigint[]))'''), {'ids': order_ids})
+                await db.commit()
+        await feed.stop()
+        await engine.dispose()
+
+    print(f'max(order_id), max(calculated_dt): {maxima_before} -> {maxima_after}')
+    print(f'ETag version:                      {version_before} -> {version_after}')
+
+    if version_after == version_before:
+        print('the late import commit did not change the ETag version')
+        return 1
+
+    print('the late import commit changed the ETag version')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ETag version under an out-of-order import commit')
+    parser.add_argument('--timeout', type=float, default=5, help='seconds to wait for each notification')
+    sys.exit(asyncio.run(main(parser.parse_args())))
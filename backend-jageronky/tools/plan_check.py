@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import difflib
+import json
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import TextClause
+
+from src.core.config import Config
+from src.core.tax_config import TaxConfig, load_tax_config
+from src.db.session import AsyncSessionLocal, engine
+from src.schemas.orders import OrderCreate
+from src.services.create_orders import CreateOrderService
+from src.services.import_orders import ImportService
+from src.services.jurisdiction import JurisdictionService
+from src.services.list_orders import ListOrdersService
+from src.services.map_orders import MapOrdersService
+from src.services.tax_rate_tables import TaxRateTablesService
+
+# Runs every service query against a local PostGIS loaded with a synthetic dataset,
+# captures EXPLAIN (ANALYZE, BUFFERS) for each statement and checks it against
+# plan_budgets.json; plan shape changes against plan_baseline.json are reported as a diff.
+# The dataset is loaded in a transaction that is rolled back at the end, so nothing is left behind.
+#
+# Statements are keyed "<scenario>:<service method>", e.g. "list_orders:ListOrdersService._fetch_orders";
+# a method that runs several statements gets "#2", "#3", ... on the later ones.
+#
+#   python -m tools.plan_check             check budgets, report plan diffs
+#   python -m tools.plan_check --strict    also fail on any plan diff
+#   python -m tools.plan_check --update    rewrite the baseline
+
+TOOLS_DIR = Path(__file__).parent
+BUDGETS_PATH = TOOLS_DIR / 'plan_budgets.json'
+BASELINE_PATH = TOOLS_DIR / 'plan_baseline.json'
+
+# NYC, the densest area of the dataset
+NYC_LAT, NYC_LON = 40.7128, -74.0060
+
+
+# AsyncSession proxy: explains each text() statement before running it, and never commits
+class ExplainingSession:
+
+    def __init__(self, db: AsyncSession, scenario: str, plans: dict):
+        self._db = db
+        self._scenario = scenario
+        self._plans = plans
+        self._counts: dict[str, int] = {}
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    async def execute(self, statement, params=None, **kwargs):
+        if isinstance(statement, TextClause):
+            label = self._caller_label()
+            self._counts[label] = self._counts.get(label, 0) + 1
+            count = self._counts[label]
+
+            key = f'{self._scenario}:{label}' + (f'#{count}' if count > 1 else '')
+            self._plans[key] = await self._explain(statement, params)
+
+        return await self._db.execute(statement, params, **kwargs)
+
+    @staticmethod
+    def _caller_label() -> str:
+        # the method that issued the statement, so keys do not shift when other statements are added
+        frame = sys._getframe(2)
+        while frame.f_back is not None and not frame.f_globals['__name__'].startswith('src.'):
+            frame = frame.f_back
+        return frame.f_code.co_qualname
+
+    async def commit(self) -> None:
+        await self._db.flush()
+
+    async def _explain(self, statement: TextClause, params) -> dict:
+        explain = text(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement.text}')
+
+        # EXPLAIN ANALYZE executes the statement; keep writes from being applied twice
+        savepoint = await self._db.begin_nested()
+        try:
+            result = await self._db.execute(explain, params)
+            plan = result.scalar_one()
+        finally:
+            await savepoint.rollback()
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]
+
+
+async def scenario_list_orders(db, tax_config: TaxConfig) -> None:
+    await ListOrdersService(db).list_orders(limit=20, offset=0)
+
+
+async def scenario_list_changes(db, tax_config: TaxConfig) -> None:
+    await ListOrdersService(db).list_changes(since='0.0', limit=200)
+
+
+async def scenario_map_clusters(db, tax_config: TaxConfig) -> None:
+    await MapOrdersService(db).get_clusters(
+        min_lat=40.70,
+        min_lon=-74.02,
+        max_lat=40.76,
+        max_lon=-73.95,
+        zoom=14,
+    )
+
+
+async def scenario_map_tile(db, tax_config: TaxConfig) -> None:
+    await MapOrdersService(db).get_tile(z=13, x=2412, y=3078)
+
+
+async def scenario_resolve(db, tax_config: TaxConfig) -> None:
+    await JurisdictionService.resolve(db=db, latitude=NYC_LAT, longitude=NYC_LON)
+
+
+async def scenario_resolve_many(db, tax_config: TaxConfig) -> None:
+    points = [(40.5 + i * 0.02, -79.5 + i * 0.035) for i in range(200)]
+    await JurisdictionService.resolve_many(db=db, points=points)
+
+
+async def scenario_create_order(db, tax_config: TaxConfig) -> None:
+    dto = OrderCreate(
+        latitude=NYC_LAT,
+        longitude=NYC_LON,
+        subtotal=100.0,
+        timestamp='2026-01-01T12:00:00Z',
+    )
+    await CreateOrderService(db, tax_config).create_order(dto)
+
+
+def synthetic_import_file() -> bytes:
+    lines = ['id,longitude,latitude,timestamp,subtotal']
+    for i in range(2000):
+        lines.append(f'{i},{-79.5 + (i % 100) * 0.075},{40.5 + (i // 100) * 0.22},2026-01-01T12:00:00Z,{10 + i % 90}.50')
+    return '\n'.join(lines).encode()
+
+
+async def scenario_import(db, tax_config: TaxConfig) -> None:
+    await ImportService(db, tax_config, tax_engine='python').import_orders(
+        file_name='plan-check.csv',
+        file_bytes=synthetic_import_file(),
+    )
+
+
+async def scenario_import_sql(db, tax_config: TaxConfig) -> None:
+    await ImportService(db, tax_config, tax_engine='sql').import_orders(
+        file_name='plan-check.csv',
+        file_bytes=synthetic_import_file(),
+    )
+
+
+SCENARIOS = {
+    'list_orders': scenario_list_orders,
+    'list_changes': scenario_list_changes,
+    'map_clusters': scenario_map_clusters,
+    'map_tile': scenario_map_tile,
+    'resolve': scenario_resolve,
+    'resolve_many': scenario_resolve_many,
+    'create_order': scenario_create_order,
+    'import': scenario_import,
+    'import_sql': scenario_import_sql,
+}
+
+
+async def load_synthetic_dataset(db: AsyncSession, rows: int) -> None:
+    print(f'loading {rows} synthetic orders...')
+
+    import_id = (await db.execute(
+        text('''
+            INSERT INTO imports (file_name, file_sha256, status, total_rows, inserted_rows)
+            VALUES ('plan-check-synthetic', 'plan-check-synthetic', 'completed', :rows, :rows)
+            RETURNING id
+        '''),
+        {'rows': rows},
+    )).scalar_one()
+
+    # half of the orders are spread over the state bbox, half are packed around NYC
+    await db.execute(
+        text('''
+            INSERT INTO orders (source, import_id, source_order_id, latitude, longitude, subtotal_cents, ordered_dt)
+            SELECT
+                'import',
+                :import_id,
+                g,
+                CASE WHEN g % 2 = 0 THEN 40.5 + random() * 4.5 ELSE 40.55 + random() * 0.35 END,
+                CASE WHEN g % 2 = 0 THEN -79.7 + random() * 7.9 ELSE -74.05 + random() * 0.3 END,
+                (random() * 50000)::bigint,
+                now() - random() * interval '365 days'
+            FROM generate_series(1, :rows) AS g
+        '''),
+        {'import_id': import_id, 'rows': rows},
+    )
+
+    await db.execute(
+        text('''
+            INSERT INTO order_taxes (
+                order_id, status, composite_rate_micros, tax_amount_cents, total_amount_cents,
+                state_rate_micros, county_rate_micros, city_rate_micros, special_rates, jurisdictions
+            )
+            SELECT
+                o.id, 'calculated', 80000, (o.subtotal_cents * 8 + 50) / 100, (o.subtotal_cents * 108 + 50) / 100,
+                40000, 40000, 0, '[]'::jsonb, '{"state": "NY"}'::jsonb
+            FROM orders o
+            WHERE o.import_id = :import_id
+        '''),
+        {'import_id': import_id},
+    )
+
+    # the new statistics are rolled back with the data; autovacuum later corrects the pg_class row estimates
+    await db.execute(text('ANALYZE imports, orders, order_taxes'))
+
+
+async def collect_plans(tax_config: TaxConfig, rows: int) -> dict:
+    plans: dict = {}
+
+    async with AsyncSessionLocal() as session:
+        await session.begin()
+        try:
+            await load_synthetic_dataset(session, rows)
+
+            for name, scenario in SCENARIOS.items():
+                savepoint = await session.begin_nested()
+                try:
+                    await scenario(ExplainingSession(session, name, plans), tax_config)
+                finally:
+                    await savepoint.rollback()
+        finally:
+            await session.rollback()
+
+    return plans
+
+
+def summarize(plan: dict) -> dict:
+    indexes: set[str] = set()
+    seq_scans: set[str] = set()
+    shape: list[str] = []
+
+    def walk(node: dict, depth: int) -> None:
+        label = node['Node Type']
+        if 'Index Name' in node:
+            indexes.add(node['Index Name'])
+            label += f' using {node["Index Name"]}'
+        if 'Relation Name' in node:
+            label += f' on {node["Relation Name"]}'
+            if node['Node Type'] == 'Seq Scan':
+                seq_scans.add(node['Relation Name'])
+        shape.append('  ' * depth + label)
+
+        for child in node.get('Plans', []):
+            walk(child, depth + 1)
+
+    root = plan['Plan']
+    walk(root, 0)
+
+    return {
+        'indexes': sorted(indexes),
+        'seq_scans': sorted(seq_scans),
+        'buffers': root.get('Shared Hit Blocks', 0) + root.get('Shared Read Blocks', 0),
+        'rows': root.get('Actual Rows', 0),
+        'time_ms': plan.get('Execution Time', 0),
+        'shape': shape,
+    }
+
+
+def check_budget(key: str, summary: dict, budget: dict) -> list[str]:
+    errors = []
+
+    for index in budget.get('indexes', []):
+        if index not in summary['indexes']:
+            errors.append(f'{key}: expected index {index}, used {summary["indexes"] or "none"}')
+
+    for table in budget.get('no_seq_scan', []):
+        if table in summary['seq_scans']:
+            errors.append(f'{key}: sequential scan on {table}')
+
+    if 'max_buffers' in budget and summary['buffers'] > budget['max_buffers']:
+        errors.append(f'{key}: {summary["buffers"]} buffers > budget {budget["max_buffers"]}')
+
+    if 'max_rows' in budget and summary['rows'] > budget['max_rows']:
+        errors.append(f'{key}: {summary["rows"]} rows > budget {budget["max_rows"]}')
+
+    return errors
+
+
+def diff_shapes(baseline: dict, summaries: dict) -> list[str]:
+    report = []
+
+    for key in sorted(set(baseline) | set(summaries)):
+        old = baseline.get(key, [])
+        new = summaries[key]['shape'] if key in summaries else []
+        if old != new:
+            report.extend(difflib.unified_diff(old, new, f'baseline/{key}', f'current/{key}', lineterm=''))
+
+    return report
+
+
+async def main(args: argparse.Namespace) -> int:
+    tax_config = load_tax_config(Config.TAX_RATES_PATH)
+
+    async with AsyncSessionLocal() as db:
+        await TaxRateTablesService(db).sync(tax_config)
+    plans = await collect_plans(tax_config, args.rows)
+    await engine.dispose()
+
+    summaries = {key: summarize(plan) for key, plan in plans.items()}
+    budgets = json.loads(BUDGETS_PATH.read_text())
+
+    errors = []
+    for key, summary in summaries.items():
+        errors.extend(check_budget(key, summary, budgets.get(key, {})))
+        print(
+            f'{key:<20} {summary["time_ms"]:>9.2f} ms {summary["buffers"]:>8} buf {summary["rows"]:>8} rows  '
+            f'{", ".join(summary["indexes"]) or "-"}'
+        )
+
+    for key in budgets:
+        if key not in summaries:
+            errors.append(f'{key}: budgeted query was not executed')
+
+    if args.update:
+        BASELINE_PATH.write_text(json.dumps({key: s['shape'] for key, s in summaries.items()}, indent=2) + '\n')
+        print(f'baseline written to {BASELINE_PATH}')
+        plan_diff = []
+    elif BASELINE_PATH.exists():
+        plan_diff = diff_shapes(json.loads(BASELINE_PATH.read_text()), summaries)
+    else:
+        print('no baseline yet, run with --update to create it')
+        plan_diff = []
+
+    if plan_diff:
+        print('\nplan changes:')
+        print('\n'.join(plan_diff))
+
+    if errors:
+        print('\nbudget violations:')
+        print('\n'.join(errors))
+
+    return 1 if errors or (args.strict and plan_diff) else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='query plan regression check')
+    parser.add_argument('--rows', type=int, default=200_000, help='synthetic orders to load')
+    parser.add_argument('--update', action='store_true', help='rewrite the plan baseline')
+    parser.add_argument('--strict', action='store_true', help='fail on any plan change')
+    sys.exit(asyncio.run(main(parser.parse_args())))
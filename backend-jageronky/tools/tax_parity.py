@@ -0,0 +1,204 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import Config
+from src.core.tax_config import TaxConfig, load_tax_config
+from src.db.session import AsyncSessionLocal, engine
+from src.services.import_orders import ImportService
+from src.services.jurisdiction import JurisdictionService
+from src.services.tax_calculation import TaxCalculationService
+from src.services.tax_rate_tables import TaxRateTablesService
+
+# Imports a synthetic file with the "sql" tax engine, then recomputes the same orders with
+# TaxCalculationService and compares every order_taxes row. Nothing is committed except the rate tables.
+#
+#   python -m tools.tax_parity                 100k orders
+#   python -m tools.tax_parity --rows 1000000
+
+# NY bbox plus a margin, so some points fall outside every boundary
+MIN_LAT, MAX_LAT = 40.3, 45.2
+MIN_LON, MAX_LON = -80.0, -71.6
+
+# share of the points placed inside city boundaries, so city exceptions are well covered
+CITY_POINT_SHARE = 0.5
+
+TAX_COLUMNS = (
+    'status',
+    'composite_rate_micros',
+    'tax_amount_cents',
+    'total_amount_cents',
+    'state_rate_micros',
+    'county_rate_micros',
+    'city_rate_micros',
+    'special_rates',
+    'jurisdictions',
+    'error_text',
+)
+
+
+# AsyncSession proxy that keeps the whole import in one transaction, so it can be rolled back
+class UncommittedSession:
+
+    def __init__(self, db: AsyncSession):
+        self._db = db
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    async def commit(self) -> None:
+        await self._db.flush()
+
+
+async def city_points(count: int, seed: int) -> list[tuple[float, float]]:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text('SELECT setseed(:seed)'), {'seed': (seed % 1000) / 1000})
+        result = await db.execute(
+            text('''
+                WITH cities AS (
+                    SELECT geom, COUNT(*) OVER () AS total
+                    FROM geo_boundaries
+                    WHERE type = 'city'
+                )
+                SELECT ST_Y(p.geom) AS latitude, ST_X(p.geom) AS longitude
+                FROM cities c
+                CROSS JOIN LATERAL ST_Dump(ST_GeneratePoints(c.geom, CEIL(CAST(:count AS float8) / c.total)::int)) p
+                LIMIT :count
+            '''),
+            {'count': count},
+        )
+        return [(row.latitude, row.longitude) for row in result]
+
+
+def build_file(rows: int, seed: int, fixed_points: list[tuple[float, float]]) -> bytes:
+    rng = random.Random(seed)
+
+    lines = ['id,longitude,latitude,timestamp,subtotal']
+    for i in range(rows):
+        if i < len(fixed_points):
+            lat, lon = fixed_points[i]
+        else:
+            lat = rng.uniform(MIN_LAT, MAX_LAT)
+            lon = rng.uniform(MIN_LON, MAX_LON)
+        cents = rng.randint(0, 1_000_000)
+        lines.append(f'{i},{lon:.6f},{lat:.6f},2026-01-01T12:00:00Z,{cents // 100}.{cents % 100:02d}')
+
+    return '\n'.join(lines).encode()
+
+
+async def fetch_taxes(db, import_id: int) -> dict[int, tuple]:
+    result = await db.execute(
+        text('''
+            SELECT t.order_id, t.status::text AS status, t.composite_rate_micros, t.tax_amount_cents,
+                   t.total_amount_cents, t.state_rate_micros, t.county_rate_micros, t.city_rate_micros,
+                   t.special_rates, t.jurisdictions, t.error_text
+            FROM order_taxes t
+            JOIN orders o ON o.id = t.order_id
+            WHERE o.import_id = :import_id
+        '''),
+        {'import_id': import_id},
+    )
+    return {row['order_id']: tuple(row[column] for column in TAX_COLUMNS) for row in result.mappings()}
+
+
+async def python_taxes(db, tax_config: TaxConfig, import_id: int) -> dict[int, tuple]:
+    tax_service = TaxCalculationService(tax_config)
+    result = await db.execute(
+        text('''SELECT id FROM orders WHERE import_id = :import_id'''),
+        {'import_id': import_id},
+    )
+    order_ids = list(result.scalars().all())
+    rows = await JurisdictionService.resolve_for_import(db=db, order_ids=order_ids)
+
+    taxes = {}
+    for row in rows:
+        record = tax_service.build_order_tax_record(
+            order_id=row['id'],
+            subtotal_cents=row['subtotal_cents'],
+            state=row['state'],
+            county=row['county_name'],
+            city=row['city_name'],
+            snapped=row['snapped'],
+        )
+        taxes[record[0]] = (*record[1:8], json.loads(record[8]), json.loads(record[9]), record[10])
+
+    return taxes
+
+
+def compare(sql_taxes: dict[int, tuple], python_taxes: dict[int, tuple]) -> list[str]:
+    errors = []
+
+    for order_id in sorted(set(sql_taxes) | set(python_taxes)):
+        sql_row = sql_taxes.get(order_id)
+        python_row = python_taxes.get(order_id)
+        if sql_row is None or python_row is None:
+            errors.append(f'order {order_id}: sql={sql_row} python={python_row}')
+            continue
+
+        for column, sql_value, python_value in zip(TAX_COLUMNS, sql_row, python_row):
+            if sql_value != python_value:
+                errors.append(f'order {order_id}: {column} sql={sql_value!r} python={python_value!r}')
+
+    return errors
+
+
+async def main(args: argparse.Namespace) -> int:
+    tax_config = load_tax_config(Config.TAX_RATES_PATH)
+
+    async with AsyncSessionLocal() as db:
+        await TaxRateTablesService(db).sync(tax_config)
+
+    points = await city_points(int(args.rows * CITY_POINT_SHARE), args.seed)
+    file_bytes = build_file(args.rows, args.seed, points)
+
+    async with AsyncSessionLocal() as session:
+        await session.begin()
+        try:
+            db = UncommittedSession(session)
+            summary = await ImportService(db, tax_config, tax_engine='sql').import_orders(
+                file_name='tax-parity.csv',
+                file_bytes=file_bytes,
+            )
+            import_id = summary['import_id']
+
+            sql_taxes = await fetch_taxes(db, import_id)
+
+            await db.execute(
+                text('''
+                    DELETE FROM order_taxes t
+                    USING orders o
+                    WHERE o.id = t.order_id
+                        AND o.import_id = :import_id
+                '''),
+                {'import_id': import_id},
+            )
+            python = await python_taxes(db, tax_config, import_id)
+        finally:
+            await session.rollback()
+
+    await engine.dispose()
+
+    errors = compare(sql_taxes, python)
+    calculated = sum(1 for row in sql_taxes.values() if row[0] == 'calculated')
+    print(f'{len(sql_taxes)} orders compared, {calculated} calculated, {len(sql_taxes) - calculated} failed')
+
+    if errors:
+        print(f'\n{len(errors)} mismatches:')
+        print('\n'.join(errors[:args.show]))
+        return 1
+
+    print('sql and python engines match')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='parity check between the sql and python tax engines')
+    parser.add_argument('--rows', type=int, default=100_000, help='synthetic orders to import')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the synthetic file')
+    parser.add_argument('--show', type=int, default=20, help='mismatches to print')
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -2,6 +2,44 @@
 set -euo pipefail
 
 export PGPASSWORD="${POSTGRES_PASSWORD}"
+export PGHOST="${POSTGRES_HOST}"
+export PGPORT="${POSTGRES_PORT}"
+export PGUSER="${POSTGRES_USER}"
+export PGDATABASE="${POSTGRES_DB}"
+
+SNAPSHOT_DIR="${SNAPSHOT_DIR:-/seed/snapshots}"
+SNAPSHOT_FORMAT=2
+# tables produced from the shapefiles; restored together from one snapshot
+SNAPSHOT_TABLES=('geo_boundaries*' state_extents)
+
+# one directory of shapefiles per state: /seed/boundaries/NY/Counties.shp, ...
+STATES=()
+for state_dir in /seed/boundaries/*/; do
+  STATES+=("$(basename "${state_dir}")")
+done
+
+psql_value() {
+  psql -v ON_ERROR_STOP=1 -tAc "$1"
+}
+
+# /seed/migrations/NNN_name.sql upgrade an existing database; schema.sql always matches the latest one
+migration_number() {
+  local name
+  name="$(basename "$1")"
+  echo "$((10#${name%%_*}))"
+}
+
+LATEST_MIGRATION=0
+for migration in /seed/migrations/*.sql; do
+  LATEST_MIGRATION="$(migration_number "${migration}")"
+done
+
+set_schema_version_sql() {
+  echo "
+    insert into seed_meta(key, value) values ('schema_version', '$1')
+    on conflict (key) do update set value = excluded.value
+  "
+}
 
 echo "Waiting for Postgres..."
 until pg_isready -h "${POSTGRES_HOST}" -p "${POSTGRES_PORT}" -U "${POSTGRES_USER}" -d "${POSTGRES_DB}"; do
@@ -10,44 +48,103 @@ done
 
 echo "Postgres is ready."
 
-echo "Applying schema.sql..."
-psql \
-  -h "${POSTGRES_HOST}" \
-  -p "${POSTGRES_PORT}" \
-  -U "${POSTGRES_USER}" \
-  -d "${POSTGRES_DB}" \
-  -f /seed/schema.sql
-
-echo "Importing Counties shapefile..."
-ogr2ogr -f PostgreSQL \
-  "PG:host=${POSTGRES_HOST} port=${POSTGRES_PORT} dbname=${POSTGRES_DB} user=${POSTGRES_USER} password=${POSTGRES_PASSWORD}" \
-  /seed/boundaries/Counties.shp \
-  -nln geo_counties_raw \
-  -lco GEOMETRY_NAME=geom \
-  -lco LAUNDER=NO \
-  -nlt PROMOTE_TO_MULTI \
-  -t_srs EPSG:4326 \
-  -select NAME \
-  -overwrite
-
-echo "Importing Cities shapefile..."
-ogr2ogr -f PostgreSQL \
-  "PG:host=${POSTGRES_HOST} port=${POSTGRES_PORT} dbname=${POSTGRES_DB} user=${POSTGRES_USER} password=${POSTGRES_PASSWORD}" \
-  /seed/boundaries/Cities.shp \
-  -nln geo_cities_raw \
-  -lco GEOMETRY_NAME=geom \
-  -lco LAUNDER=NO \
-  -nlt PROMOTE_TO_MULTI \
-  -t_srs EPSG:4326 \
-  -select NAME,COUNTY \
-  -overwrite
-
-echo "Applying transform_boundaries.sql..."
-psql \
-  -h "${POSTGRES_HOST}" \
-  -p "${POSTGRES_PORT}" \
-  -U "${POSTGRES_USER}" \
-  -d "${POSTGRES_DB}" \
-  -f /seed/transform_boundaries.sql
+psql -v ON_ERROR_STOP=1 -c "create table if not exists seed_meta(key text primary key, value text not null)"
+
+if [ "$(psql_value "select to_regclass('public.geo_boundaries') is not null")" = "t" ]; then
+  # databases created before migrations existed have no version and get every migration
+  SCHEMA_VERSION="$(psql_value "select coalesce((select value from seed_meta where key = 'schema_version'), '0')")"
+  echo "Schema version ${SCHEMA_VERSION}, latest ${LATEST_MIGRATION}."
+
+  for migration in /seed/migrations/*.sql; do
+    version="$(migration_number "${migration}")"
+    if [ "${version}" -le "${SCHEMA_VERSION}" ]; then
+      continue
+    fi
+
+    echo "Applying migration $(basename "${migration}")..."
+    psql -v ON_ERROR_STOP=1 --single-transaction -f "${migration}" -c "$(set_schema_version_sql "${version}")"
+  done
+else
+  echo "Applying schema.sql..."
+  psql -v ON_ERROR_STOP=1 --single-transaction -f /seed/schema.sql -c "$(set_schema_version_sql "${LATEST_MIGRATION}")"
+fi
+
+BOUNDARY_CHECKSUM="$(
+  {
+    echo "format ${SNAPSHOT_FORMAT}"
+    for state in "${STATES[@]}"; do
+      echo "state ${state}"
+      sha256sum "/seed/boundaries/${state}"/* | awk '{print $1}'
+    done
+    sha256sum /seed/transform_boundaries.sql | awk '{print $1}'
+  } | sha256sum | cut -c1-16
+)"
+SNAPSHOT_FILE="${SNAPSHOT_DIR}/boundaries-${BOUNDARY_CHECKSUM}.dump"
+
+echo "Boundary checksum: ${BOUNDARY_CHECKSUM}"
+
+if [ "$(psql_value "select value from seed_meta where key = 'boundary_checksum'")" = "${BOUNDARY_CHECKSUM}" ]; then
+  echo "Boundaries are up to date, skipping seeding."
+  exit 0
+fi
+
+psql -v ON_ERROR_STOP=1 -c "truncate geo_boundaries, state_extents restart identity"
+
+for state in "${STATES[@]}"; do
+  psql -v ON_ERROR_STOP=1 -c "
+    create table if not exists geo_boundaries_${state,,}
+    partition of geo_boundaries for values in ('${state}')
+  "
+done
+
+if [ -f "${SNAPSHOT_FILE}" ] && (cd "${SNAPSHOT_DIR}" && sha256sum --quiet -c "$(basename "${SNAPSHOT_FILE}").sha256"); then
+  echo "Restoring boundaries from snapshot ${SNAPSHOT_FILE}..."
+  pg_restore --data-only --no-owner --exit-on-error -d "${POSTGRES_DB}" "${SNAPSHOT_FILE}"
+else
+  for state in "${STATES[@]}"; do
+    echo "Importing ${state} Counties shapefile..."
+    ogr2ogr -f PostgreSQL \
+      "PG:host=${POSTGRES_HOST} port=${POSTGRES_PORT} dbname=${POSTGRES_DB} user=${POSTGRES_USER} password=${POSTGRES_PASSWORD}" \
+      "/seed/boundaries/${state}/Counties.shp" \
+      -nln geo_counties_raw \
+      -lco GEOMETRY_NAME=geom \
+      -lco LAUNDER=NO \
+      -nlt PROMOTE_TO_MULTI \
+      -t_srs EPSG:4326 \
+      -select NAME \
+      -overwrite
+
+    echo "Importing ${state} Cities shapefile..."
+    ogr2ogr -f PostgreSQL \
+      "PG:host=${POSTGRES_HOST} port=${POSTGRES_PORT} dbname=${POSTGRES_DB} user=${POSTGRES_USER} password=${POSTGRES_PASSWORD}" \
+      "/seed/boundaries/${state}/Cities.shp" \
+      -nln geo_cities_raw \
+      -lco GEOMETRY_NAME=geom \
+      -lco LAUNDER=NO \
+      -nlt PROMOTE_TO_MULTI \
+      -t_srs EPSG:4326 \
+      -select NAME,COUNTY \
+      -overwrite
+
+    echo "Applying transform_boundaries.sql for ${state}..."
+    psql -v ON_ERROR_STOP=1 -v state="${state}" -f /seed/transform_boundaries.sql
+  done
+
+  echo "Writing snapshot ${SNAPSHOT_FILE}..."
+  mkdir -p "${SNAPSHOT_DIR}"
+  table_args=()
+  for table in "${SNAPSHOT_TABLES[@]}"; do
+    table_args+=(-t "${table}")
+  done
+  pg_dump --format=custom --data-only --no-owner "${table_args[@]}" -f "${SNAPSHOT_FILE}.tmp"
+  mv "${SNAPSHOT_FILE}.tmp" "${SNAPSHOT_FILE}"
+  (cd "${SNAPSHOT_DIR}" && sha256sum "$(basename "${SNAPSHOT_FILE}")" > "$(basename "${SNAPSHOT_FILE}").sha256")
+fi
+
+psql -v ON_ERROR_STOP=1 -c "analyze geo_boundaries, state_extents"
+psql -v ON_ERROR_STOP=1 -c "
+  insert into seed_meta(key, value) values ('boundary_checksum', '${BOUNDARY_CHECKSUM}')
+  on conflict (key) do update set value = excluded.value
+"
 
 echo "DB seeding completed."
\ No newline at end of file
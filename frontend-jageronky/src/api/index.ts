@@ -1,10 +1,13 @@
-export { importOrders, createOrder, getOrders } from './orders'
+export { importOrders, createOrder, getOrders, getOrdersMap } from './orders'
 export { BASE_URL } from './config'
 export type {
   Order,
   OrderCreate,
   OrdersListParams,
   OrdersListResponse,
+  OrdersMapParams,
+  OrdersMapResponse,
+  MapCluster,
   ImportResponse,
   ImportSuccessResponse,
   ImportDuplicateResponse,
@@ -4,6 +4,8 @@ import type {
   OrderCreate,
   OrdersListParams,
   OrdersListResponse,
+  OrdersMapParams,
+  OrdersMapResponse,
   ImportResponse,
 } from './types'
 
@@ -76,3 +78,11 @@ export async function getOrders(params?: OrdersListParams): Promise<OrdersListRe
   await throwIfNotOk(response)
   return response.json() as Promise<OrdersListResponse>
 }
+
+export async function getOrdersMap(params: OrdersMapParams): Promise<OrdersMapResponse> {
+  const url = buildUrl(`${ORDERS_PREFIX}/map`, { ...params })
+  const response = await fetch(url)
+
+  await throwIfNotOk(response)
+  return response.json() as Promise<OrdersMapResponse>
+}
@@ -25,6 +25,7 @@
     county?: string | null
     city?: string | null
     special?: string[]
+    snapped?: boolean
   }
 
   // request body for POST /orders
@@ -52,6 +53,30 @@
     max_subtotal?: number
   }
 
+  // request params for GET /orders/map (leaflet viewport)
+  export interface OrdersMapParams {
+    min_lat: number
+    min_lon: number
+    max_lat: number
+    max_lon: number
+    zoom: number
+  }
+
+  export interface MapCluster {
+    latitude: number
+    longitude: number
+    count: number
+    order_id: number | null
+    total_amount: number
+  }
+
+  // response for GET /orders/map
+  export interface OrdersMapResponse {
+    items: MapCluster[]
+    zoom: number
+    cell_size: number
+  }
+
 
   export interface ImportSuccessResponse {
     import_id: number
@@ -3,6 +3,12 @@ import { importOrders } from '../api'
 import { isImportSuccess } from '../api/types'
 import './Drawer.css'
 
+const IMPORT_EXTENSIONS = [
+  '.csv', '.csv.gz', '.csv.zst',
+  '.parquet', '.arrow', '.arrows', '.feather',
+  '.ndjson', '.jsonl', '.ndjson.gz', '.jsonl.gz', '.ndjson.zst', '.jsonl.zst',
+]
+
 interface Props {
   open: boolean
   onClose: () => void
@@ -18,7 +24,8 @@ export default function ImportDrawer({ open, onClose, onImported }: Props) {
   const fileRef = useRef<HTMLInputElement>(null)
 
   const handleFile = useCallback((f: File) => {
-    if (!f.name.toLowerCase().endsWith('.csv')) { setResult({ type: 'error', msg: 'Select a .csv file' }); return }
+    const name = f.name.toLowerCase()
+    if (!IMPORT_EXTENSIONS.some(ext => name.endsWith(ext))) { setResult({ type: 'error', msg: 'Select a .csv, .parquet, .arrow or .ndjson file' }); return }
     setFile(f); setResult({ type: 'idle', msg: '' })
   }, [])
 
@@ -72,7 +79,7 @@ export default function ImportDrawer({ open, onClose, onImported }: Props) {
             onDragLeave={() => setDragging(false)}
             onDrop={handleDrop}
           >
-            <input ref={fileRef} type="file" accept=".csv" style={{ display: 'none' }}
+            <input ref={fileRef} type="file" accept={IMPORT_EXTENSIONS.join(',')} style={{ display: 'none' }}
               onChange={e => { const f = e.target.files?.[0]; if (f) handleFile(f) }} />
             {!file ? (
               <>
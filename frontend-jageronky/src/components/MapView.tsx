@@ -1,8 +1,9 @@
-import { useEffect, useRef, useState } from 'react'
+import { useCallback, useEffect, useRef, useState } from 'react'
 import { MapContainer, TileLayer, Marker, Popup, useMap, useMapEvents } from 'react-leaflet'
 import L from 'leaflet'
 import 'leaflet/dist/leaflet.css'
-import type { Order } from '../api'
+import { getOrdersMap } from '../api'
+import type { MapCluster, Order } from '../api'
 import './MapView.css'
 
 function mkIcon() {
@@ -14,6 +15,97 @@ function mkIcon() {
   })
 }
 
+function mkClusterIcon(count: number) {
+  const size = count < 100 ? 26 : count < 10000 ? 34 : 42
+  return L.divIcon({
+    className: '',
+    html: `<div class="map-cluster" style="width:${size}px;height:${size}px">${count.toLocaleString()}</div>`,
+    iconSize: [size, size],
+    iconAnchor: [size / 2, size / 2],
+  })
+}
+
+const clamp = (value: number, limit: number) => Math.max(-limit, Math.min(limit, value))
+
+// fetches server-side clusters for the visible viewport, so the map never holds one marker per order
+function useViewportClusters(refreshKey: unknown, onError: (message: string | null) => void) {
+  const map = useMap()
+  const [clusters, setClusters] = useState<MapCluster[]>([])
+  const requestId = useRef(0)
+
+  const load = useCallback(async () => {
+    const id = ++requestId.current
+    // zoomed out, leaflet reports longitudes beyond ±180 (the world repeats); the API accepts only the valid range
+    const bounds = map.getBounds()
+    try {
+      const data = await getOrdersMap({
+        min_lat: clamp(bounds.getSouth(), 90),
+        min_lon: clamp(bounds.getWest(), 180),
+        max_lat: clamp(bounds.getNorth(), 90),
+        max_lon: clamp(bounds.getEast(), 180),
+        zoom: map.getZoom(),
+      })
+      // a newer viewport was requested meanwhile
+      if (id !== requestId.current) return
+      setClusters(data.items)
+      onError(null)
+    } catch (e) {
+      if (id !== requestId.current) return
+      // the previous viewport's clusters would be misleading here
+      setClusters([])
+      onError(e instanceof Error ? e.message : 'Failed to load orders')
+    }
+  }, [map, onError])
+
+  useMapEvents({ moveend: load })
+  useEffect(() => { load() }, [load, refreshKey])
+
+  return clusters
+}
+
+function ClusterLayer({ orders, onSelectOrder, onError, icon }: {
+  orders: Order[]
+  onSelectOrder: (id: number) => void
+  onError: (message: string | null) => void
+  icon: L.DivIcon
+}) {
+  const map = useMap()
+  const clusters = useViewportClusters(orders, onError)
+
+  return (
+    <>
+      {clusters.map(c => {
+        if (c.order_id === null) {
+          return (
+            <Marker key={`${c.latitude},${c.longitude}`} position={[c.latitude, c.longitude]} icon={mkClusterIcon(c.count)}
+              eventHandlers={{ click: () => map.flyTo([c.latitude, c.longitude], Math.min(map.getZoom() + 2, map.getMaxZoom())) }}
+            />
+          )
+        }
+
+        const orderId = c.order_id
+        const o = orders.find(order => order.id === orderId)
+        return (
+          <Marker key={orderId} position={[c.latitude, c.longitude]} icon={icon}
+            eventHandlers={{ click: () => onSelectOrder(orderId) }}
+          >
+            <Popup>
+              <div className="map-popup">
+                <div className="map-popup-id">ORD-{String(orderId).padStart(3, '0')}</div>
+                <div className="map-popup-coords">{c.latitude.toFixed(4)}, {c.longitude.toFixed(4)}</div>
+                {o && <div className="map-popup-row">Subtotal: <b>${o.subtotal.toFixed(2)}</b></div>}
+                {o && <div className="map-popup-row">Rate: <b>{(o.composite_tax_rate * 100).toFixed(3)}%</b></div>}
+                {o && <div className="map-popup-row">Tax: <b>${o.tax_amount.toFixed(2)}</b></div>}
+                <div className="map-popup-total">Total: ${c.total_amount.toFixed(2)}</div>
+              </div>
+            </Popup>
+          </Marker>
+        )
+      })}
+    </>
+  )
+}
+
 function FlyTo({ lat, lon }: { lat: number; lon: number }) {
   const map = useMap()
   useEffect(() => {
@@ -53,6 +145,7 @@ export default function MapView({ orders, selectedOrderId, onSelectOrder }: Prop
   const overlayLon = selectedOrder?.longitude ?? mouse.lon
   const overlayRate = selectedOrder ? (selectedOrder.composite_tax_rate * 100).toFixed(3) + '%' : '—'
   const icon = useRef(mkIcon())
+  const [mapError, setMapError] = useState<string | null>(null)
 
   return (
     <div className="map-wrap">
@@ -61,23 +154,9 @@ export default function MapView({ orders, selectedOrderId, onSelectOrder }: Prop
         <MapResize />
         <MouseTracker onMove={(lat, lon) => setMouse({ lat, lon })} />
         {selectedOrder && <FlyTo lat={selectedOrder.latitude} lon={selectedOrder.longitude} />}
-        {orders.map(o => (
-          <Marker key={o.id} position={[o.latitude, o.longitude]} icon={icon.current}
-            eventHandlers={{ click: () => onSelectOrder(o.id) }}
-          >
-            <Popup>
-              <div className="map-popup">
-                <div className="map-popup-id">ORD-{String(o.id).padStart(3, '0')}</div>
-                <div className="map-popup-coords">{o.latitude.toFixed(4)}, {o.longitude.toFixed(4)}</div>
-                <div className="map-popup-row">Subtotal: <b>${o.subtotal.toFixed(2)}</b></div>
-                <div className="map-popup-row">Rate: <b>{(o.composite_tax_rate * 100).toFixed(3)}%</b></div>
-                <div className="map-popup-row">Tax: <b>${o.tax_amount.toFixed(2)}</b></div>
-                <div className="map-popup-total">Total: ${o.total_amount.toFixed(2)}</div>
-              </div>
-            </Popup>
-          </Marker>
-        ))}
+        <ClusterLayer orders={orders} onSelectOrder={onSelectOrder} onError={setMapError} icon={icon.current} />
       </MapContainer>
+      {mapError && <div className="map-error">Map data unavailable: {mapError}</div>}
       <div className="map-overlay">
         <div className="map-overlay-title">Delivery Point</div>
         <div className="coord-row"><span className="coord-key">LAT</span><span className="coord-val">{overlayLat ? overlayLat.toFixed(5) : '—'}</span></div>